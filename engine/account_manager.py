@@ -1,71 +1,208 @@
 import random
 from pathlib import Path
-from urllib.parse import quote_plus
-from .utils import load_json, log, BASE_DIR
-from .post_generator import generate_post
-from .airtable_client import airtable_get, airtable_create, airtable_update
+from .utils import log, load_json, ACCOUNTS_DIR
+from .config import get_account_settings, get_master_settings
+from .post_generator import generate_post, generate_posts
+from .airtable_client import airtable_iter
+from .airtable_mirror import get_mirror
+from .airtable_writer import AirtableWriteBuffer
+from .content_queue import save_post_to_queue
+from .queue_store import get_queue_store
+from .topic_pool import TopicPool
+from .image_generator import generate_image_for_post
+from .metrics import metrics, span
+from .render_queue import RenderQueue
+from .run_journal import get_journal
+from .leases import get_lease_store
+from .sharding import current_shard, sharding_settings
+from .dedup import dedup_settings, get_dedup_index
 
 
 class AccountManager:
     def __init__(self) -> None:
-        self.accounts_dir = BASE_DIR / "accounts"
+        self.accounts_dir = ACCOUNTS_DIR
         self.account_name_to_id = self._load_accounts_table()
+        self.writer = AirtableWriteBuffer()
+        self.journal = get_journal()
+        self.shard = current_shard()
+        self.leases = get_lease_store()
+        self.lease_ttl = float(sharding_settings()["lease_seconds"])
+        self.dedup = get_dedup_index()
+        self.dedup_settings = dedup_settings()
+        if self.shard.count > 1:
+            log(f"[SHARD] Replica {self.shard.index + 1}/{self.shard.count} ({self.shard.worker_id})")
+        self.topic_pool: TopicPool | None = None
+        self.multi_topic = self._multi_topic_size()
+        media = get_master_settings().section("media")
+        self.make_images = bool(media.get("images", False))
+        self.make_videos = self.make_images and bool(media.get("videos", False))
+        self.render_queue: RenderQueue | None = None
+        if self.make_videos:
+            self.render_queue = RenderQueue(
+                max_workers=media.get("render_workers"),
+                timeout=float(media.get("render_timeout", 180)),
+            )
+
+    @staticmethod
+    def _multi_topic_size() -> int:
+        """Topics per LLM request (`multi_topic_batch` in master_settings.json)."""
+        return max(1, int(get_master_settings().multi_topic_batch))
 
     # ──────────────────────────────────────────────────────────
     def _load_accounts_table(self) -> dict[str, str]:
         """Load all accounts from Airtable and map names → record IDs."""
         mapping = {}
-        for rec in airtable_get("Accounts"):
+        mirror = get_mirror()
+        for rec in mirror.records("Accounts") if mirror else airtable_iter("Accounts", fields=["Name"]):
             name = rec["fields"].get("Name")
             if name:
                 mapping[name] = rec["id"]
         log(f"[ACCOUNTS] Loaded {len(mapping)} accounts from Airtable.")
         return mapping
 
+    def reload_accounts(self) -> None:
+        """Re-read the Accounts table (in place, so the topic pool sees it too)."""
+        mapping = self._load_accounts_table()
+        self.account_name_to_id.clear()
+        self.account_name_to_id.update(mapping)
+
     def get_all_accounts(self) -> list[Path]:
-        """Return all account directories except the template."""
+        """Return this replica's account directories (all but the template)."""
         return [
             p for p in self.accounts_dir.iterdir()
-            if p.is_dir() and p.name != "TEMPLATE_ACCOUNT"
+            if p.is_dir() and p.name != "TEMPLATE_ACCOUNT" and self.shard.owns(p.name)
         ]
 
+    def daily_posts(self, account_path: Path) -> int:
+        """Posts per run for an account, from `daily_posts` in its settings.json."""
+        return get_account_settings(account_path).daily_posts
+
     # ──────────────────────────────────────────────────────────
+    def prefetch_topics(self, accounts: list[Path]) -> None:
+        """Fill the topic pool for every account in one Topics scan."""
+        from .batch_jobs import pending_topic_ids
+
+        if self.topic_pool is None:
+            self.topic_pool = TopicPool(self.account_name_to_id, self.leases, self.shard.worker_id, self.lease_ttl)
+        with span("topic_fetch"):
+            self.topic_pool.prefetch([p.name for p in accounts])
+        # Half-finished topics belong to the resume pass, pending batch
+        # topics to their batch job, not to a new claim.
+        self.topic_pool.discard(self.journal.in_flight_ids())
+        self.topic_pool.discard(pending_topic_ids())
+        if self.dedup:
+            self.dedup.prune_skipped(int(self.dedup_settings["skip_days"]))
+            self.topic_pool.discard(self.dedup.skipped_ids())
+
     def _next_topic(self, account_name: str) -> tuple[str, str] | None:
-        """Fetch a random 'To Use' topic for a given account."""
+        """Fetch (and lease) a random 'To Use' topic for a given account."""
         formula = f"AND(Account='{account_name}', Status='To Use')"
-        url = (
-            "Topics?"
-            "fields[]=Topic&fields[]=Account&fields[]=Status&"
-            f"filterByFormula={quote_plus(formula)}"
-        )
+        recs = airtable_iter("Topics", fields=["Topic", "Account", "Status"], formula=formula)
+        from .batch_jobs import pending_topic_ids
+
+        taken = pending_topic_ids() | (self.dedup.skipped_ids() if self.dedup else set())
+        recs = (rec for rec in recs if rec["id"] not in taken)
+
+        if self.leases is None:
+            # Reservoir sample so every page is considered without holding them all.
+            picked = None
+            with span("topic_fetch"):
+                for seen, rec in enumerate(recs, start=1):
+                    if random.randrange(seen) == 0:
+                        picked = rec
+            return (picked["id"], picked["fields"]["Topic"]) if picked else None
 
-        recs = airtable_get(url)
-        if not recs:
-            return None
+        with span("topic_fetch"):
+            candidates = [(rec["id"], rec["fields"]["Topic"]) for rec in recs]
+        random.shuffle(candidates)
+        for topic_id, text in candidates:
+            if self.leases.acquire([topic_id], self.shard.worker_id, self.lease_ttl):
+                return topic_id, text
+        return None
 
-        picked = random.choice(recs)
-        return picked["id"], picked["fields"]["Topic"]
+    def claim_topics(self, account_name: str, n: int) -> list[tuple[str, str]]:
+        """Take `n` topics from the prefetched pool (without one, a single topic from Airtable)."""
+        if self.topic_pool is not None:
+            return self.topic_pool.claim(account_name, n)
+        topic = self._next_topic(account_name)
+        return [topic] if topic else []
 
     # ──────────────────────────────────────────────────────────
-    def generate_for_account(self, account_path: Path) -> None:
-        """Generate one post for the given account."""
+    def generate_for_account(self, account_path: Path, count: int | None = None) -> list[dict]:
+        """
+        Generate `count` posts (default: the account's daily_posts) and
+        return one run summary per saved post.
+        """
         account_name = account_path.name
-        topic = self._next_topic(account_name)
+        wanted = count or self.daily_posts(account_path)
 
-        if not topic:
-            log(f"[{account_name}] No topics available.")
-            return
+        results = []
+        fresh = []
+        handled = 0
+        # Near-duplicate topics are skipped before any API call; top up the
+        # claim a couple of times so they don't eat into the post count.
+        for _ in range(3):
+            topics = self.claim_topics(account_name, wanted - handled)
+            if not topics:
+                break
+            for topic_id, topic_text in topics:
+                entry = self.journal.claim(account_name, topic_id, topic_text, self.shard.worker_id)
+                if entry["state"] == "generated":
+                    log(f"[{account_name}] Reusing journaled post for topic: {topic_text}")
+                    results.append(self.save_post(account_name, topic_id, topic_text, entry["post"], entry["queue_path"]))
+                elif entry["state"] in ("post_created", "topic_marked"):
+                    self._mark_topic_used(topic_id)
+                elif self.dedup and self.dedup.is_duplicate_topic(
+                    account_name, topic_text, float(self.dedup_settings["topic_threshold"])
+                ):
+                    self._skip_topic(account_name, topic_id, "topic")
+                    continue
+                else:
+                    fresh.append((topic_id, topic_text))
+                handled += 1
+            if handled >= wanted:
+                break
 
-        topic_id, topic_text = topic
-        post = generate_post(topic_text, style_key=None)
+        if not handled:
+            log(f"[{account_name}] No topics available.")
+            return []
 
-        if not post:
-            log(f"[{account_name}] Post generation failed.")
-            return
+        for i in range(0, len(fresh), self.multi_topic):
+            group = fresh[i:i + self.multi_topic]
+            with span("llm_generate"):
+                posts = generate_posts([text for _, text in group], style_key=None)
+            for (topic_id, topic_text), post in zip(group, posts):
+                if post is None and len(group) > 1:
+                    with span("llm_generate_single"):
+                        post = generate_post(topic_text, style_key=None)
+                if not post:
+                    metrics.inc("bot_posts_total", account=account_name, outcome="failed")
+                    log(f"[{account_name}] Post generation failed.")
+                    if self.leases is not None:
+                        self.leases.release([topic_id], self.shard.worker_id)
+                    continue
+                # Drop near-copies of past posts before paying for image/video.
+                if self.dedup and self.dedup.is_duplicate_post(
+                    account_name, post, float(self.dedup_settings["post_threshold"])
+                ):
+                    self._skip_topic(account_name, topic_id, "post")
+                    continue
+                metrics.inc("bot_posts_total", account=account_name, outcome="generated")
+                self.journal.generated(topic_id, post)
+                results.append(self.save_post(account_name, topic_id, topic_text, post))
+        return results
 
+    def save_post(self, account_name: str, topic_id: str, topic_text: str, post: dict, queue_path: str | None = None) -> dict:
+        """
+        Queue the Posts create (the Topics update follows once it succeeds),
+        generate the image and submit the video render. The local queue file
+        is written here when there is no render, otherwise by
+        `complete_renders` once the video is done. An existing `queue_path`
+        (from a resumed journal entry) is reused along with its media.
+        """
         # Save to Airtable "Posts"
         log(f"[DEBUG] Final hashtags string: {', '.join([str(h) for h in post.get('hashtags', []) if h])}")
-        airtable_create(
+        post_record = self.writer.create(
             "Posts",
             {
                 "Account": [self.account_name_to_id[account_name]],
@@ -77,6 +214,172 @@ class AccountManager:
             },
         )
 
-        # Update the topic as used
-        airtable_update("Topics", topic_id, {"Status": "Used"})
-        log(f"[{account_name}] Saved post for topic: {topic_text}")
+        post_record.add_done_callback(lambda f: self._post_created(topic_id, f))
+        log(f"[{account_name}] Queued Airtable writes for topic: {topic_text}")
+
+        if self.dedup:
+            self.dedup.add_post(account_name, f"topic:{topic_id}", topic_text, post)
+
+        if queue_path and Path(queue_path).exists():
+            queued = load_json(queue_path)
+            return {
+                "account": account_name,
+                "topic_id": topic_id,
+                "topic": topic_text,
+                "post": post,
+                "queue_path": Path(queue_path),
+                "image_path": queued.get("image_path"),
+                "video_path": queued.get("video_path"),
+                "post_record": post_record,
+            }
+
+        image_path = None
+        render_job = None
+        if self.make_images:
+            image_path = generate_image_for_post(account_name, topic_text, post, style_key=None)
+        if image_path and self.render_queue:
+            render_job = self.render_queue.submit(account_name, topic_text, post, image_path, style_key=None)
+
+        result = {
+            "account": account_name,
+            "topic_id": topic_id,
+            "topic": topic_text,
+            "post": post,
+            "queue_path": None,
+            "image_path": image_path,
+            "video_path": None,
+            "post_record": post_record,  # Future → Airtable record, resolved on flush
+        }
+        if render_job is None:
+            result["queue_path"] = save_post_to_queue(account_name, topic_text, post, image_path)
+            self.journal.set_queue_path(topic_id, result["queue_path"])
+        else:
+            result["render_job"] = render_job
+        return result
+
+    def _skip_topic(self, account_name: str, topic_id: str, kind: str) -> None:
+        """
+        Set a near-duplicate topic aside: forget its journal entry, remember
+        it in the dedup index (so it isn't claimed again) and either give it
+        `dedup.topic_status` in Airtable or release it (it stays 'To Use'
+        and is set aside for `dedup.skip_days`).
+        """
+        self.journal.forget(topic_id)
+        self.dedup.skip_topic(account_name, topic_id, kind)
+        status = self.dedup_settings.get("topic_status")
+        if status:
+            update = self.writer.update("Topics", topic_id, {"Status": status})
+            update.add_done_callback(lambda f: self._topic_retired(topic_id, f))
+        elif self.leases is not None:
+            self.leases.release([topic_id], self.shard.worker_id)
+
+    def _topic_retired(self, topic_id: str, future) -> None:
+        """The skipped topic left 'To Use' in Airtable; the dedup index needn't hold it."""
+        if future.exception() is None:
+            self.dedup.unskip([topic_id])
+
+    def _post_created(self, topic_id: str, future) -> None:
+        """Posts create landed: journal it, then mark the topic Used."""
+        if future.exception() is not None:
+            return  # stays 'generated'; the next resume pass retries it
+        self.journal.post_created(topic_id, future.result().get("id"))
+        self._mark_topic_used(topic_id)
+
+    def _mark_topic_used(self, topic_id: str) -> None:
+        update = self.writer.update("Topics", topic_id, {"Status": "Used"})
+        update.add_done_callback(lambda f: self._topic_marked(topic_id, f))
+
+    def _topic_marked(self, topic_id: str, future) -> None:
+        if future.exception() is not None:
+            return
+        self.journal.topic_marked(topic_id)
+        if self.leases is not None:
+            self.leases.complete([topic_id], self.shard.worker_id)
+
+    def _find_post(self, account_name: str, topic_text: str) -> dict | None:
+        """A Posts record already created for this account/topic, if any."""
+        topic = topic_text.replace("'", "\\'")
+        for rec in airtable_iter("Posts", fields=["Topic"], formula=f"AND(Account='{account_name}', Topic='{topic}')"):
+            return rec
+        return None
+
+    def resume_journal(self) -> list[dict]:
+        """
+        Finish topics a previous run left half-done. Generated posts are
+        saved without calling the LLM again (unless Airtable already has the
+        post), created posts just get their topic marked, and bare claims are
+        dropped. Returns run summaries for the posts saved here.
+
+        Only this worker's entries, and others' that went stale for a lease
+        period, are taken; call it with no slots running and the write
+        buffer flushed, or live work would be resumed twice. With several
+        replicas, each resumes only accounts it owns and topics whose lease
+        it can take.
+        """
+        self.journal.prune()
+        results = []
+        for entry in self.journal.resumable(self.shard.worker_id, self.lease_ttl):
+            account_name, topic_id, topic_text = entry["account"], entry["topic_id"], entry["topic"]
+            if not self.shard.owns(account_name):
+                continue
+            if self.leases is not None and not self.leases.acquire([topic_id], self.shard.worker_id, self.lease_ttl):
+                continue  # another replica holds it
+            if entry["state"] == "claimed":
+                self.journal.forget(topic_id)
+                if self.leases is not None:
+                    self.leases.release([topic_id], self.shard.worker_id)
+            elif account_name not in self.account_name_to_id:
+                log(f"[JOURNAL] Unknown account {account_name!r}; leaving topic {topic_id} for later.")
+            elif entry["state"] == "post_created":
+                self._link_queue(entry["queue_path"], entry["record_id"])
+                self._mark_topic_used(topic_id)
+            else:
+                existing = self._find_post(account_name, topic_text)
+                if existing:
+                    self.journal.post_created(topic_id, existing["id"])
+                    self._link_queue(entry["queue_path"], existing["id"])
+                    self._mark_topic_used(topic_id)
+                else:
+                    log(f"[{account_name}] Resuming journaled post for topic: {topic_text}")
+                    results.append(self.save_post(account_name, topic_id, topic_text, entry["post"], entry["queue_path"]))
+        if results:
+            log(f"[JOURNAL] Resumed {len(results)} post(s) from the journal.")
+        return results
+
+    def complete_renders(self, results: list[dict]) -> None:
+        """Wait for submitted video renders and write their local queue files."""
+        for result in results:
+            job = result.pop("render_job", None)
+            if job is None:
+                continue
+            result["video_path"] = self.render_queue.result(job)
+            result["queue_path"] = save_post_to_queue(
+                result["account"], result["topic"], result["post"],
+                result["image_path"], result["video_path"],
+            )
+            self.journal.set_queue_path(result["topic_id"], result["queue_path"])
+
+    def link_records(self, results: list[dict]) -> None:
+        """
+        After the write buffer has flushed, attach each new Posts record ID to
+        its summary and to the local queue row (the publisher uses that link
+        to find the post's media).
+        """
+        for result in results:
+            future = result.pop("post_record", None)
+            if future is None or not future.done() or future.exception() is not None:
+                continue
+            result["airtable_id"] = future.result().get("id")
+            self._link_queue(result["queue_path"], result["airtable_id"])
+
+    @staticmethod
+    def _link_queue(queue_path: str | Path | None, record_id: str | None) -> None:
+        """Point the local queue row at its Posts record (if both are known)."""
+        if queue_path and record_id:
+            get_queue_store().link_airtable(queue_path, record_id)
+
+    def close(self) -> None:
+        """Flush buffered Airtable writes and stop the render workers."""
+        self.writer.close()
+        if self.render_queue:
+            self.render_queue.shutdown()
@@ -1,48 +1,300 @@
 import os
+import random
+import threading
+import time
+from collections.abc import Callable, Iterator
+from urllib.parse import parse_qsl
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from .utils import log
-
-# Load environment variables
-load_dotenv()
+from .concurrency import backend_slot
+from .metrics import metrics
 
 AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
+AIRTABLE_API_URL = os.getenv("AIRTABLE_API_URL", "https://api.airtable.com/v0")
 
-def _headers():
-    return {
-        "Authorization": f"Bearer {AIRTABLE_API_KEY}",
-        "Content-Type": "application/json"
-    }
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BATCH_SIZE = 10  # Airtable's max records per create/update request
 
-def airtable_get(table):
-    url = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{table}"
-    res = requests.get(url, headers=_headers())
 
-    if res.status_code != 200:
-        log(f"Airtable GET error ({table}): {res.text}")
-        return []
+class AirtableError(Exception):
+    """Raised when an Airtable request still fails after all retries."""
 
-    return res.json().get("records", [])
+    def __init__(self, method: str, table: str, status: int | None, text: str):
+        super().__init__(f"Airtable {method} {table} failed ({status}): {text}")
+        self.method = method
+        self.table = table
+        self.status = status
+        self.text = text
 
-def airtable_create(table, fields):
-    url = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{table}"
-    payload = {"fields": fields}
-    res = requests.post(url, headers=_headers(), json=payload)
 
-    if res.status_code not in (200, 201):
-        log(f"Airtable CREATE error ({table}): {res.text}")
-        return None
+class TokenBucket:
+    """Thread-safe token bucket; `acquire()` blocks until a token is free."""
 
-    return res.json()
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
 
-def airtable_update(table, record_id, fields):
-    url = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{table}/{record_id}"
-    payload = {"fields": fields}
-    res = requests.patch(url, headers=_headers(), json=payload)
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class AirtableClient:
+    """
+    Airtable REST client for one base.
+
+    Reuses a keep-alive `requests.Session`, throttles to Airtable's
+    5 req/s per-base limit with a token bucket, and retries 429/5xx with
+    jittered exponential backoff. Per-method latency is kept in `stats`.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_id: str | None = None,
+        api_url: str | None = None,
+        rate_per_sec: float = 5.0,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 30.0,
+    ):
+        self.api_key = api_key or AIRTABLE_API_KEY
+        self.base_id = base_id or AIRTABLE_BASE_ID
+        self.api_url = (api_url or AIRTABLE_API_URL).rstrip("/")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate_per_sec)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self._headers())
+
+        self._stats_lock = threading.Lock()
+        self._stats: dict[str, dict[str, float]] = {}
+        # Called with (table, records) after every successful create/update.
+        self._write_listeners: list[Callable[[str, list[dict]], None]] = []
+
+    def _headers(self) -> dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    def url(self, table: str) -> str:
+        return f"{self.api_url}/{self.base_id}/{table}"
+
+    def add_write_listener(self, listener: Callable[[str, list[dict]], None]) -> None:
+        """Have `listener(table, records)` see every record this client writes."""
+        self._write_listeners.append(listener)
+
+    def _written(self, table: str, records: list[dict]) -> None:
+        for listener in self._write_listeners:
+            try:
+                listener(table, records)
+            except Exception as e:
+                log(f"Airtable write listener failed ({table}): {e}")
+
+    # ──────────────────────────────────────────────────────────
+    def _record(self, method: str, elapsed: float, ok: bool, retries: int) -> None:
+        metrics.observe("bot_external_seconds", elapsed, service="airtable", method=method)
+        metrics.inc("bot_external_requests_total", service="airtable", method=method, outcome="ok" if ok else "error")
+        if retries:
+            metrics.inc("bot_external_retries_total", retries, service="airtable", method=method)
+        with self._stats_lock:
+            s = self._stats.setdefault(method, {
+                "calls": 0, "errors": 0, "retries": 0,
+                "total_ms": 0.0, "max_ms": 0.0,
+            })
+            s["calls"] += 1
+            s["retries"] += retries
+            s["errors"] += 0 if ok else 1
+            ms = elapsed * 1000
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Return a snapshot of per-method call counts and latencies (ms)."""
+        with self._stats_lock:
+            out = {}
+            for method, s in self._stats.items():
+                out[method] = dict(s, avg_ms=s["total_ms"] / s["calls"] if s["calls"] else 0.0)
+            return out
+
+    def _backoff(self, attempt: int, res: requests.Response | None) -> float:
+        if res is not None and res.headers.get("Retry-After"):
+            try:
+                return float(res.headers["Retry-After"])
+            except ValueError:
+                pass
+        # Full jitter: random point in [0, base * 2^attempt], capped.
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method: str, table: str, **kwargs) -> dict:
+        """Send one request with throttling and retries; returns the JSON body."""
+        url = kwargs.pop("url", None) or self.url(table)
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        res = None
+        error = ""
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                with backend_slot("airtable"):
+                    res = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                res, error = None, str(e)
+            else:
+                if res.status_code in (200, 201):
+                    self._record(method, time.perf_counter() - start, True, attempt)
+                    return res.json()
+                error = res.text
+                if res.status_code not in RETRY_STATUSES:
+                    break
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, res)
+                log(f"Airtable {method} retry {attempt + 1}/{self.max_retries} ({table}) in {delay:.2f}s")
+                time.sleep(delay)
+
+        self._record(method, time.perf_counter() - start, False, attempt)
+        raise AirtableError(method, table, res.status_code if res is not None else None, error)
+
+    # ──────────────────────────────────────────────────────────
+    def iter_pages(
+        self,
+        table: str,
+        page_size: int = 100,
+        fields: list[str] | None = None,
+        formula: str | None = None,
+        max_records: int | None = None,
+    ) -> Iterator[list[dict]]:
+        """
+        Yield one page of records at a time, following Airtable's `offset` token.
 
-    if res.status_code not in (200, 201):
-        log(f"Airtable UPDATE error ({table}): {res.text}")
+        `table` may still carry a legacy query string ("Posts?filterByFormula=...");
+        those parameters are merged with the keyword arguments.
+        """
+        table, _, query = table.partition("?")
+        params: list[tuple[str, str]] = [
+            (k, v) for k, v in parse_qsl(query) if k not in ("offset", "pageSize")
+        ]
+        params.append(("pageSize", str(min(max(page_size, 1), 100))))
+        for name in fields or []:
+            params.append(("fields[]", name))
+        if formula:
+            params = [(k, v) for k, v in params if k != "filterByFormula"]
+            params.append(("filterByFormula", formula))
+        if max_records:
+            params.append(("maxRecords", str(max_records)))
+
+        offset = None
+        while True:
+            page_params = params + ([("offset", offset)] if offset else [])
+            body = self.request("GET", table, params=page_params)
+            yield body.get("records", [])
+            offset = body.get("offset")
+            if not offset:
+                return
+
+    def iter_records(self, table: str, **kwargs) -> Iterator[dict]:
+        """Stream every record of `table`; takes the same arguments as `iter_pages`."""
+        for page in self.iter_pages(table, **kwargs):
+            yield from page
+
+    def get(self, table: str, **kwargs) -> list[dict]:
+        return list(self.iter_records(table, **kwargs))
+
+    def create(self, table: str, fields: dict) -> dict:
+        record = self.request("POST", table, json={"fields": fields})
+        self._written(table, [record])
+        return record
+
+    def update(self, table: str, record_id: str, fields: dict) -> dict:
+        record = self.request("PATCH", table, url=f"{self.url(table)}/{record_id}", json={"fields": fields})
+        self._written(table, [record])
+        return record
+
+    def create_many(self, table: str, fields_list: list[dict]) -> list[dict]:
+        """Create records in Airtable's batch form, BATCH_SIZE per request."""
+        created = []
+        for i in range(0, len(fields_list), BATCH_SIZE):
+            chunk = fields_list[i:i + BATCH_SIZE]
+            body = self.request("POST", table, json={"records": [{"fields": f} for f in chunk]})
+            created.extend(body.get("records", []))
+            self._written(table, body.get("records", []))
+        return created
+
+    def update_many(self, table: str, updates: list[tuple[str, dict]]) -> list[dict]:
+        """Patch `(record_id, fields)` pairs in batches of BATCH_SIZE."""
+        updated = []
+        for i in range(0, len(updates), BATCH_SIZE):
+            chunk = updates[i:i + BATCH_SIZE]
+            body = self.request("PATCH", table, json={
+                "records": [{"id": rid, "fields": f} for rid, f in chunk]
+            })
+            updated.extend(body.get("records", []))
+            self._written(table, body.get("records", []))
+        return updated
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_client: AirtableClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> AirtableClient:
+    """Return the process-wide client so every caller shares one pool and limiter."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AirtableClient()
+        return _client
+
+
+def airtable_get(table, **kwargs):
+    """Return every record of `table` (all pages); see `airtable_iter` to stream."""
+    try:
+        return get_client().get(table, **kwargs)
+    except AirtableError as e:
+        log(f"Airtable GET error ({table}): {e.text}")
+        return []
+
+def airtable_iter(table, **kwargs):
+    """Stream records page by page; stops (after logging) on an Airtable error."""
+    try:
+        yield from get_client().iter_records(table, **kwargs)
+    except AirtableError as e:
+        log(f"Airtable GET error ({table}): {e.text}")
+
+def airtable_create(table, fields):
+    try:
+        return get_client().create(table, fields)
+    except AirtableError as e:
+        log(f"Airtable CREATE error ({table}): {e.text}")
         return None
 
-    return res.json()
+def airtable_update(table, record_id, fields):
+    try:
+        return get_client().update(table, record_id, fields)
+    except AirtableError as e:
+        log(f"Airtable UPDATE error ({table}): {e.text}")
+        return None
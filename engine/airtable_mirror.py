@@ -0,0 +1,222 @@
+"""
+Local SQLite mirror of the Airtable tables the engine reads.
+
+The first sync of a table downloads it in full; later syncs only ask for
+records with `LAST_MODIFIED_TIME()` after the table's watermark, so read
+traffic scales with churn instead of table size. Writes still go straight
+to Airtable; the mirror registers a write listener on the client, so
+records the engine creates or updates show up in it immediately.
+
+Delta syncs can't see deleted records, so a table is re-downloaded in
+full every `full_sync_hours`. If a sync fails, `records` serves the last
+good copy — a short Airtable slowdown doesn't stop a run. Status-driven
+reads (posts to publish, topics to claim) use `fresh_records` instead,
+which returns None on a failed sync so the caller queries Airtable
+directly rather than acting on a stale status.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from .airtable_client import AirtableClient, AirtableError, get_client
+from .config import get_master_settings
+from .metrics import metrics, span
+from .utils import CACHE_DIR, ensure_dir, log
+
+DEFAULT_DB = CACHE_DIR / "airtable_mirror.db"
+
+DEFAULT_MIRROR_SETTINGS = {
+    "enabled": True,
+    "min_sync_interval": 30,  # seconds between delta syncs of one table
+    "full_sync_hours": 24,    # full re-download (drops deleted records)
+}
+# Overlap each delta window so clock skew can't drop an edit.
+WATERMARK_SKEW = timedelta(minutes=2)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    tbl          TEXT NOT NULL,
+    id           TEXT NOT NULL,
+    created_time TEXT,
+    fields       TEXT NOT NULL,
+    PRIMARY KEY (tbl, id)
+);
+CREATE INDEX IF NOT EXISTS idx_records_created ON records (tbl, created_time);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    tbl            TEXT PRIMARY KEY,
+    watermark      TEXT NOT NULL,
+    full_synced_at REAL NOT NULL
+);
+"""
+
+
+def mirror_settings() -> dict:
+    return {**DEFAULT_MIRROR_SETTINGS, **get_master_settings().section("airtable_mirror")}
+
+
+def _utc(dt: datetime) -> str:
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class AirtableMirror:
+    def __init__(
+        self,
+        client: AirtableClient | None = None,
+        db_path: Path = DEFAULT_DB,
+        min_sync_interval: float = 30.0,
+        full_sync_hours: float = 24.0,
+    ):
+        self.client = client or get_client()
+        self.db_path = Path(db_path)
+        self.min_sync_interval = min_sync_interval
+        self.full_sync_seconds = full_sync_hours * 3600
+        ensure_dir(self.db_path.parent)
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._last_sync: dict[str, float] = {}
+        self.client.add_write_listener(self.apply)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections aren't shareable)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _lock(self, table: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(table, threading.Lock())
+
+    # ──────────────────────────────────────────────────────────
+    def sync(self, table: str, full: bool = False) -> bool:
+        """
+        Bring `table` up to date (full download or delta since the watermark).
+        Returns False if Airtable couldn't be reached; the old copy is kept.
+        """
+        with self._lock(table):
+            if not full and time.monotonic() - self._last_sync.get(table, -1e9) < self.min_sync_interval:
+                return True
+            state = self._conn().execute("SELECT * FROM sync_state WHERE tbl = ?", (table,)).fetchone()
+            full = full or state is None or time.time() - state["full_synced_at"] > self.full_sync_seconds
+            started = datetime.now(timezone.utc)
+            formula = None if full else f"IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{state['watermark']}'))"
+            try:
+                with span("mirror_sync", table=table, mode="full" if full else "delta"):
+                    records = self.client.get(table, formula=formula)
+            except (AirtableError, OSError) as e:
+                metrics.inc("bot_mirror_sync_failures_total", table=table)
+                log(f"[MIRROR] {table} sync failed ({e}); keeping the last synced copy.")
+                return False
+
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if full:
+                    conn.execute("DELETE FROM records WHERE tbl = ?", (table,))
+                self._upsert(conn, table, records, merge=False)
+                conn.execute(
+                    "INSERT INTO sync_state (tbl, watermark, full_synced_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(tbl) DO UPDATE SET watermark = excluded.watermark, "
+                    "full_synced_at = CASE WHEN ? THEN excluded.full_synced_at ELSE full_synced_at END",
+                    (table, _utc(started - WATERMARK_SKEW), time.time(), full),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._last_sync[table] = time.monotonic()
+            metrics.inc("bot_mirror_records_synced_total", len(records), table=table)
+            log(f"[MIRROR] {table}: {'full' if full else 'delta'} sync, {len(records)} record(s).")
+            return True
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, table: str, records: list[dict], merge: bool) -> None:
+        for rec in records:
+            fields = rec.get("fields", {})
+            if merge:
+                row = conn.execute("SELECT fields FROM records WHERE tbl = ? AND id = ?", (table, rec["id"])).fetchone()
+                if row:
+                    fields = {**json.loads(row["fields"]), **fields}
+            conn.execute(
+                "INSERT INTO records (tbl, id, created_time, fields) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(tbl, id) DO UPDATE SET fields = excluded.fields, "
+                "created_time = COALESCE(excluded.created_time, created_time)",
+                (table, rec["id"], rec.get("createdTime"), json.dumps(fields)),
+            )
+
+    def apply(self, table: str, records: list[dict]) -> None:
+        """Write-through: fold records Airtable just returned into the mirror."""
+        if not records:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._upsert(conn, table, records, merge=True)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ──────────────────────────────────────────────────────────
+    def select(self, table: str, limit: int | None = None, **equals) -> list[dict]:
+        """
+        Mirrored records whose fields equal `equals`, oldest first. A
+        list-valued field (linked records) matches if it contains the value.
+        Records come back in Airtable's shape: {id, createdTime, fields}.
+        """
+        where, params = ["tbl = ?"], [table]
+        for name, value in equals.items():
+            path = f'$."{name}"'
+            where.append(
+                "(json_extract(fields, ?) = ? OR EXISTS "
+                "(SELECT 1 FROM json_each(fields, ?) WHERE json_each.value = ?))"
+            )
+            params += [path, value, path, value]
+        sql = f"SELECT id, created_time, fields FROM records WHERE {' AND '.join(where)} ORDER BY created_time, id"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [
+            {"id": r["id"], "createdTime": r["created_time"], "fields": json.loads(r["fields"])}
+            for r in self._conn().execute(sql, params)
+        ]
+
+    def records(self, table: str, limit: int | None = None, **equals) -> list[dict]:
+        """Sync `table` (a delta, usually) and then `select` from it."""
+        self.sync(table)
+        return self.select(table, limit=limit, **equals)
+
+    def fresh_records(self, table: str, limit: int | None = None, **equals) -> list[dict] | None:
+        """Like `records`, but None instead of the last copy when the sync fails."""
+        if not self.sync(table):
+            return None
+        return self.select(table, limit=limit, **equals)
+
+
+_mirror: AirtableMirror | None = None
+_mirror_lock = threading.Lock()
+
+
+def get_mirror() -> AirtableMirror | None:
+    """The process-wide mirror, or None when `airtable_mirror.enabled` is off."""
+    global _mirror
+    with _mirror_lock:
+        if _mirror is None:
+            settings = mirror_settings()
+            if not settings["enabled"]:
+                return None
+            _mirror = AirtableMirror(
+                min_sync_interval=float(settings["min_sync_interval"]),
+                full_sync_hours=float(settings["full_sync_hours"]),
+            )
+        return _mirror
@@ -0,0 +1,130 @@
+"""
+Buffered Airtable writer.
+
+Creates and updates are queued per table and sent in Airtable's
+10-record batch form. A buffer flushes when a table reaches BATCH_SIZE
+pending writes, when its oldest write is `max_delay` seconds old, and on
+`flush()` / `close()`. Every queued write returns a Future that resolves
+to the record Airtable sent back (so callers get the new record ID).
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+from .airtable_client import AirtableClient, AirtableError, BATCH_SIZE, get_client
+from .metrics import metrics, span
+from .utils import log
+
+
+class AirtableWriteBuffer:
+    def __init__(
+        self,
+        client: AirtableClient | None = None,
+        batch_size: int = BATCH_SIZE,
+        max_delay: float = 5.0,
+    ):
+        self.client = client or get_client()
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        # (kind, table) -> list of (payload, future); kind is "create" or "update"
+        self._pending: dict[tuple[str, str], list[tuple[object, Future]]] = {}
+        self._oldest: dict[tuple[str, str], float] = {}
+        self._stop = threading.Event()
+        self._timer: threading.Thread | None = None
+
+    # ──────────────────────────────────────────────────────────
+    def create(self, table: str, fields: dict) -> Future:
+        """Queue a record create; the Future resolves to the created record."""
+        return self._add(("create", table), fields)
+
+    def update(self, table: str, record_id: str, fields: dict) -> Future:
+        """Queue a record patch; the Future resolves to the updated record."""
+        return self._add(("update", table), (record_id, fields))
+
+    def _add(self, key: tuple[str, str], payload) -> Future:
+        future: Future = Future()
+        with self._lock:
+            self._ensure_timer()
+            items = self._pending.setdefault(key, [])
+            if not items:
+                self._oldest[key] = time.monotonic()
+            items.append((payload, future))
+            batch = self._take(key) if len(items) >= self.batch_size else None
+        if batch:
+            self._send(key, batch)
+        return future
+
+    def _take(self, key: tuple[str, str]) -> list[tuple[object, Future]]:
+        self._oldest.pop(key, None)
+        return self._pending.pop(key, [])
+
+    def _send(self, key: tuple[str, str], batch: list[tuple[object, Future]]) -> None:
+        kind, table = key
+        payloads = [p for p, _ in batch]
+        metrics.inc("bot_airtable_records_written_total", len(batch), kind=kind, table=table)
+        try:
+            with span("airtable_write"):
+                if kind == "create":
+                    records = self.client.create_many(table, payloads)
+                else:
+                    records = self.client.update_many(table, payloads)
+        except AirtableError as e:
+            log(f"Airtable batch {kind.upper()} error ({table}, {len(batch)} records): {e.text}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        # Airtable returns records in request order.
+        for (_, future), record in zip(batch, records):
+            future.set_result(record)
+        for _, future in batch[len(records):]:
+            future.set_exception(AirtableError(kind, table, None, "record missing from batch response"))
+
+    # ──────────────────────────────────────────────────────────
+    def flush(self, older_than: float | None = None) -> None:
+        """
+        Send pending writes (only those older than `older_than` seconds if
+        given). A full flush repeats until nothing is pending, so writes that
+        Future callbacks queue while it runs are sent too.
+        """
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                keys = [
+                    k for k, t in self._oldest.items()
+                    if older_than is None or now - t >= older_than
+                ]
+                batches = [(k, self._take(k)) for k in keys]
+            if not batches:
+                return
+            for key, batch in batches:
+                for i in range(0, len(batch), self.batch_size):
+                    self._send(key, batch[i:i + self.batch_size])
+            if older_than is not None:
+                return
+
+    def _ensure_timer(self) -> None:
+        if self._timer is None and self.max_delay > 0:
+            self._timer = threading.Thread(target=self._run_timer, name="airtable-writer", daemon=True)
+            self._timer.start()
+
+    def _run_timer(self) -> None:
+        while not self._stop.wait(self.max_delay / 2):
+            self.flush(older_than=self.max_delay)
+
+    def close(self) -> None:
+        """Stop the background timer and flush everything still pending."""
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
+            self._timer = None
+        self._stop = threading.Event()  # the buffer stays usable after close()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
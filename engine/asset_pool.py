@@ -0,0 +1,180 @@
+"""
+Warm pool of pre-generated images, per account and image style.
+
+Image generation takes seconds per call, so instead of always generating
+on a post's critical path, the pool is refilled in the background (by the
+daemon between slots, or `python -m tools.fill_asset_pool` from cron) and
+`generate_image_for_post` takes a ready image when one exists.
+
+Pooled images can't know the post they will end up under, so they are
+drawn from the account's niche and image style rather than a title; the
+pool is opt-in (`asset_pool.enabled`) for that reason. Each request asks
+for `variants` images at once. Images older than `max_age_hours` are
+evicted instead of served. Derivatives (upload JPEG, thumbnail, video
+background; see `media_prep`) are written at refill time and travel with
+the image when it is taken.
+
+Files live under cache/asset_pool/<account>/<style>/. Taking one is an
+atomic rename, so concurrent slots never get the same image.
+"""
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from .config import get_account_settings, get_master_settings, get_style
+from .metrics import metrics, span
+from .utils import CACHE_DIR, ensure_dir, log
+
+DEFAULT_DIR = CACHE_DIR / "asset_pool"
+
+DEFAULT_ASSET_POOL_SETTINGS = {
+    "enabled": False,
+    "depth": 3,            # ready images to keep per account/style
+    "variants": 3,         # images per API request (n)
+    "max_age_hours": 72,   # older images are dropped, not served
+    "prewarm_video": True,  # also prepare the 9:16 video background (if media.videos)
+}
+
+
+def asset_pool_settings() -> dict:
+    return {**DEFAULT_ASSET_POOL_SETTINGS, **get_master_settings().section("asset_pool")}
+
+
+def pool_prompt(niche: str, img_style: str) -> str:
+    return f"""
+        Create a high-quality vertical image (2:3 ratio) suitable for Pinterest / social media.
+
+        Visual style: {img_style}
+
+        Account niche: "{niche}"
+
+        Do NOT include any text on the image.
+        Just create a visually appealing background/scene that fits the niche and style
+        and works behind many different post titles.
+        """
+
+
+class AssetPool:
+    def __init__(
+        self,
+        pool_dir: Path = DEFAULT_DIR,
+        depth: int = 3,
+        variants: int = 3,
+        max_age_hours: float = 72.0,
+        prewarm_video: bool = True,
+    ):
+        self.pool_dir = Path(pool_dir)
+        self.depth = max(0, depth)
+        self.variants = max(1, variants)
+        self.max_age = max_age_hours * 3600
+        self.prewarm_video = prewarm_video
+        self._lock = threading.Lock()
+
+    def _dir(self, account: str, style_key: str | None) -> Path:
+        return self.pool_dir / account / get_style(style_key).key
+
+    def ready(self, account: str, style_key: str | None = None) -> list[Path]:
+        """Unexpired pooled images, oldest first; expired ones are deleted on the way."""
+        folder = self._dir(account, style_key)
+        if not folder.is_dir():
+            return []
+        now = time.time()
+        ready = []
+        for path in sorted(folder.iterdir()):
+            try:
+                if now - path.stat().st_mtime > self.max_age:
+                    path.unlink()  # also derivatives and .part files left by a crash
+                    if path.suffix == ".png":
+                        metrics.inc("bot_asset_pool_evicted_total")
+                    continue
+            except FileNotFoundError:
+                continue  # taken meanwhile
+            if path.suffix == ".png":
+                ready.append(path)
+        return ready
+
+    # ──────────────────────────────────────────────────────────
+    def take(self, account: str, style_key: str | None, dest: Path) -> Path | None:
+        """Move a pooled image (and its derivatives) to `dest`; None if the pool is empty."""
+        from .media_prep import DERIVATIVE_SUFFIXES, derivative_paths
+
+        for path in self.ready(account, style_key):
+            claimed = path.with_suffix(".taken")
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+            dest = Path(dest)
+            ensure_dir(dest.parent)
+            shutil.move(claimed, dest)
+            for kind, derived in derivative_paths(path).items():
+                shutil.move(derived, dest.with_name(f"{dest.stem}{DERIVATIVE_SUFFIXES[kind]}"))
+            metrics.inc("bot_asset_pool_takes_total", result="hit")
+            return dest
+        metrics.inc("bot_asset_pool_takes_total", result="miss")
+        return None
+
+    def refill(self, account: str, niche: str, style_key: str | None = None) -> int:
+        """Top the account's pool up to `depth`; returns how many images were added."""
+        from .image_generator import request_images, write_image
+
+        with self._lock:
+            missing = self.depth - len(self.ready(account, style_key))
+            if missing <= 0:
+                return 0
+            folder = self._dir(account, style_key)
+            ensure_dir(folder)
+            prompt = pool_prompt(niche, get_style(style_key).image_style)
+            added = 0
+            with span("asset_pool_refill", account=account):
+                while added < missing:
+                    batch = request_images(prompt, n=min(self.variants, missing - added))
+                    if not batch:
+                        break
+                    for b64 in batch:
+                        name = f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+                        tmp = folder / f"{name}.part"
+                        write_image(b64, tmp, video=None if self.prewarm_video else False)
+                        tmp.replace(folder / f"{name}.png")
+                        added += 1
+            metrics.inc("bot_asset_pool_generated_total", added, account=account)
+            log(f"[{account}] Asset pool +{added} image(s).")
+            return added
+
+    def refill_accounts(self, account_paths: list[Path], stop: threading.Event | None = None) -> int:
+        """Refill every account's pool (its niche, default style); stops early if `stop` is set."""
+        added = 0
+        for path in account_paths:
+            if stop is not None and stop.is_set():
+                break
+            try:
+                added += self.refill(path.name, get_account_settings(path).niche)
+            except Exception as e:
+                metrics.inc("bot_stage_errors_total", stage="asset_pool_refill")
+                log(f"[{path.name}] Asset pool refill failed: {e}")
+        return added
+
+
+_pool: AssetPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_asset_pool() -> AssetPool | None:
+    """The process-wide pool, or None when `asset_pool.enabled` is off."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            settings = asset_pool_settings()
+            if not settings["enabled"]:
+                return None
+            _pool = AssetPool(
+                depth=int(settings["depth"]),
+                variants=int(settings["variants"]),
+                max_age_hours=float(settings["max_age_hours"]),
+                prewarm_video=bool(settings["prewarm_video"]),
+            )
+        return _pool
@@ -0,0 +1,190 @@
+"""
+Offline generation through the OpenAI Batch API.
+
+`prepare_batch` claims topics for every account and writes a JSONL job
+file of chat-completion requests plus a manifest under batches/;
+`submit_batch` uploads it; `ingest_batch` downloads the finished output
+and saves each post exactly like a live run (Posts create, Topics update,
+local queue file). Topics listed in a pending manifest (prepared or
+submitted) are not claimed again, by batches or by live runs; a job that
+is cancelled (`cancel_job`), fails or expires gives its topics back.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+from .account_manager import AccountManager
+from .openai_client import get_openai_client
+from .post_generator import build_request, parse_post
+from .utils import DATA_DIR, ensure_dir, load_json, log, save_json
+
+BATCH_DIR = DATA_DIR / "batches"
+ENDPOINT = "/v1/chat/completions"
+# Manifest states whose topics are free again (or already used).
+CLOSED_STATUSES = {"ingested", "cancelled", "failed", "expired"}
+
+
+def _manifests() -> list[Path]:
+    return sorted(BATCH_DIR.glob("*.manifest.json")) if BATCH_DIR.exists() else []
+
+
+def pending_topic_ids() -> set[str]:
+    ids = set()
+    for path in _manifests():
+        manifest = load_json(path)
+        if manifest.get("status") not in CLOSED_STATUSES:
+            ids.update(item["topic_id"] for item in manifest["items"].values())
+    return ids
+
+
+def prepare_batch(account_manager: AccountManager, accounts: list[Path]) -> Path | None:
+    """Claim topics for `accounts` and write `<job>.jsonl` + `<job>.manifest.json`."""
+    account_manager.prefetch_topics(accounts)  # leaves out topics of pending jobs
+
+    job = datetime.now().strftime("batch_%Y%m%d_%H%M%S")
+    ensure_dir(BATCH_DIR)
+    jsonl_path = BATCH_DIR / f"{job}.jsonl"
+
+    items = {}
+    with open(jsonl_path, "w", encoding="utf-8") as f:
+        for acc_path in accounts:
+            name = acc_path.name
+            for topic_id, topic_text in account_manager.claim_topics(name, account_manager.daily_posts(acc_path)):
+                custom_id = f"{name}:{topic_id}"
+                items[custom_id] = {"account": name, "topic_id": topic_id, "topic": topic_text}
+                f.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": ENDPOINT,
+                    "body": build_request(topic_text, style_key=None),
+                }) + "\n")
+
+    if not items:
+        jsonl_path.unlink()
+        log("[BATCH] No topics to batch.")
+        return None
+
+    save_json(BATCH_DIR / f"{job}.manifest.json", {
+        "job": job, "status": "prepared", "batch_id": None,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "items": items,
+    })
+    log(f"[BATCH] Wrote {len(items)} request(s) to {jsonl_path}")
+    return jsonl_path
+
+
+def submit_batch(jsonl_path: Path) -> str:
+    """Upload a prepared job file and start the batch; returns the batch ID."""
+    manifest_path = jsonl_path.with_suffix(".manifest.json")
+    manifest = load_json(manifest_path)
+    with open(jsonl_path, "rb") as f:
+        uploaded = get_openai_client().files.create(file=f, purpose="batch")
+    batch = get_openai_client().batches.create(input_file_id=uploaded.id, endpoint=ENDPOINT, completion_window="24h")
+
+    manifest.update(status="submitted", batch_id=batch.id)
+    save_json(manifest_path, manifest)
+    log(f"[BATCH] Submitted {manifest['job']} as {batch.id}")
+    return batch.id
+
+
+def _find_manifest(batch_id: str) -> Path | None:
+    for path in _manifests():
+        if load_json(path).get("batch_id") == batch_id:
+            return path
+    return None
+
+
+def _job_manifest(job: str) -> Path | None:
+    """Manifest for a job name (batch_YYYYmmdd_HHMMSS) or a batch ID."""
+    path = BATCH_DIR / f"{job}.manifest.json"
+    return path if path.exists() else _find_manifest(job)
+
+
+def submit_job(job: str) -> str | None:
+    """Submit a job written by `prepare --no-submit`; returns the batch ID."""
+    manifest_path = _job_manifest(job)
+    if not manifest_path:
+        log(f"[BATCH] No job {job}")
+        return None
+    manifest = load_json(manifest_path)
+    if manifest["status"] != "prepared":
+        log(f"[BATCH] {job} is {manifest['status']}; only prepared jobs can be submitted.")
+        return None
+    return submit_batch(BATCH_DIR / f"{manifest['job']}.jsonl")
+
+
+def cancel_job(job: str) -> bool:
+    """Cancel a prepared or submitted job and give its topics back."""
+    manifest_path = _job_manifest(job)
+    if not manifest_path:
+        log(f"[BATCH] No job {job}")
+        return False
+    manifest = load_json(manifest_path)
+    if manifest["status"] in CLOSED_STATUSES:
+        log(f"[BATCH] {job} is already {manifest['status']}.")
+        return False
+    if manifest["status"] == "submitted":
+        get_openai_client().batches.cancel(manifest["batch_id"])
+    manifest.update(status="cancelled", cancelled_at=datetime.now().isoformat(timespec="seconds"))
+    save_json(manifest_path, manifest)
+    log(f"[BATCH] Cancelled {manifest['job']}; its {len(manifest['items'])} topic(s) are free again.")
+    return True
+
+
+def ingest_batch(account_manager: AccountManager, batch_id: str) -> list[dict]:
+    """Save every post from a completed batch; returns the run summaries."""
+    manifest_path = _find_manifest(batch_id)
+    if not manifest_path:
+        log(f"[BATCH] No manifest for batch {batch_id}")
+        return []
+    manifest = load_json(manifest_path)
+    if manifest["status"] in CLOSED_STATUSES:
+        log(f"[BATCH] {batch_id} is {manifest['status']}; not ingesting it.")
+        return []
+
+    batch = get_openai_client().batches.retrieve(batch_id)
+    if batch.status in ("failed", "expired", "cancelled"):
+        manifest["status"] = batch.status
+        save_json(manifest_path, manifest)
+        log(f"[BATCH] {batch_id} {batch.status}; its topics are free again.")
+        return []
+    if batch.status != "completed":
+        log(f"[BATCH] {batch_id} is {batch.status}; nothing to ingest yet.")
+        return []
+
+    results = []
+    try:
+        output = get_openai_client().files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            item = manifest["items"].get(row.get("custom_id"))
+            response = row.get("response") or {}
+            if not item or response.get("status_code") != 200:
+                log(f"[BATCH] Skipping {row.get('custom_id')}: {row.get('error') or response.get('status_code')}")
+                continue
+            try:
+                post = parse_post(response["body"]["choices"][0]["message"]["content"])
+            except (KeyError, IndexError, ValueError) as e:
+                log(f"[BATCH] Bad output for {row['custom_id']}: {e}")
+                continue
+            results.append(account_manager.save_post(item["account"], item["topic_id"], item["topic"], post))
+        account_manager.complete_renders(results)
+    finally:
+        account_manager.close()
+    account_manager.link_records(results)
+
+    manifest["status"] = "ingested"
+    manifest["ingested_at"] = datetime.now().isoformat(timespec="seconds")
+    save_json(manifest_path, manifest)
+    log(f"[BATCH] Ingested {len(results)} post(s) from {batch_id}")
+    return results
+
+
+def list_batches() -> list[dict]:
+    return [
+        {k: m.get(k) for k in ("job", "batch_id", "status", "created_at")} | {"items": len(m["items"])}
+        for m in (load_json(p) for p in _manifests())
+    ]
@@ -0,0 +1,61 @@
+"""
+Concurrency limits shared by every worker thread in a run.
+
+Each external backend (OpenAI, Airtable, ...) gets its own bounded
+semaphore so a wide account pool can't flood a single API.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from .config import get_master_settings
+
+DEFAULT_LIMITS = {
+    "accounts": 4,   # accounts processed in parallel by run_once
+    "openai": 4,     # in-flight OpenAI requests
+    "airtable": 5,   # in-flight Airtable requests
+}
+
+_lock = threading.Lock()
+_limits: dict[str, int] | None = None
+_semaphores: dict[str, threading.BoundedSemaphore] = {}
+
+
+def load_limits() -> dict[str, int]:
+    """Read the `concurrency` block of master_settings.json over the defaults."""
+    limits = dict(DEFAULT_LIMITS)
+    for key, value in get_master_settings().concurrency.items():
+        limits[key] = max(1, int(value))
+    return limits
+
+
+def configure(limits: dict[str, int] | None = None) -> dict[str, int]:
+    """(Re)build the per-backend semaphores. Call before starting workers."""
+    global _limits
+    with _lock:
+        _limits = limits if limits is not None else load_limits()
+        _semaphores.clear()
+        return dict(_limits)
+
+
+def get_limit(name: str) -> int:
+    limits = _limits if _limits is not None else configure()
+    return limits.get(name, 1)
+
+
+def _semaphore(name: str) -> threading.BoundedSemaphore:
+    limit = get_limit(name)
+    with _lock:
+        sem = _semaphores.get(name)
+        if sem is None:
+            sem = threading.BoundedSemaphore(limit)
+            _semaphores[name] = sem
+        return sem
+
+
+@contextmanager
+def backend_slot(name: str):
+    """Hold one of the in-flight slots for `name` while the block runs."""
+    sem = _semaphore(name)
+    with sem:
+        yield
@@ -0,0 +1,181 @@
+"""
+Central config registry.
+
+Each JSON file is parsed once and cached with its mtime; later lookups
+only `stat()` the file and re-parse when it changed on disk, so a
+long-running process picks up edits without a restart. A file that
+can't be read or parsed (e.g. caught mid-write) is logged and the last
+good value — or the defaults, on first load — is served until the file
+changes again. Parsed configs are returned as frozen dataclasses /
+read-only mappings.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
+
+from .utils import ACCOUNTS_DIR, BASE_DIR, load_json, log
+
+CONFIG_DIR = BASE_DIR / "config"
+
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+@dataclass(frozen=True)
+class StyleConfig:
+    key: str
+    text_style: str = "friendly"
+    image_style: str = "clean, bright, simple background"
+    video_style: str = ""
+
+
+@dataclass(frozen=True)
+class MasterSettings:
+    openai_model: str = "gpt-4o-mini"
+    default_style_key: str = "default"
+    max_title_length: int = 70
+    max_description_length: int = 500
+    multi_topic_batch: int = 1
+    concurrency: Mapping[str, int] = field(default_factory=lambda: MappingProxyType({}))
+    llm_cache: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    extra: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    def section(self, name: str) -> Mapping[str, Any]:
+        """A top-level block (known or not) as a read-only mapping, `{}` if absent."""
+        value = getattr(self, name, None)
+        if value is None:
+            value = self.extra.get(name)
+        return value if isinstance(value, Mapping) else MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class AccountSettings:
+    account_name: str
+    niche: str = "general"
+    style_key: str | None = None
+    style: str = ""
+    platforms: tuple[str, ...] = ()
+    daily_posts: int = 1
+    schedule: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    extra: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+
+def _split(raw: dict, cls) -> tuple[dict, dict]:
+    known = {f for f in cls.__dataclass_fields__ if f != "extra"}
+    return (
+        {k: freeze(v) for k, v in raw.items() if k in known},
+        {k: v for k, v in raw.items() if k not in known},
+    )
+
+
+class ConfigRegistry:
+    def __init__(self, config_dir: Path = CONFIG_DIR, accounts_dir: Path = ACCOUNTS_DIR):
+        self.config_dir = Path(config_dir)
+        self.accounts_dir = Path(accounts_dir)
+        self._lock = threading.Lock()
+        # cache key -> (file stamps, parsed object)
+        self._cache: dict[Any, tuple[tuple, Any]] = {}
+
+    @staticmethod
+    def _stamp(path: Path) -> tuple[int, int] | None:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _get(self, key: Any, paths: tuple[Path, ...], build: Callable[..., Any]) -> Any:
+        """Return the cached object for `key` unless any of `paths` changed."""
+        stamps = tuple(self._stamp(p) for p in paths)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] == stamps:
+                return cached[1]
+        raws, failed = [], False
+        for path, stamp in zip(paths, stamps):
+            try:
+                raws.append(load_json(path) if stamp else None)
+            except (OSError, ValueError) as e:
+                # Half-written or malformed file: keep the last good value
+                # (or the defaults) until it changes on disk again.
+                log(f"Config {path} unreadable, keeping previous settings: {e}")
+                raws.append(None)
+                failed = True
+        if failed and cached:
+            parsed = cached[1]
+        else:
+            parsed = build(*raws)
+        with self._lock:
+            self._cache[key] = (stamps, parsed)
+        return parsed
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    # ──────────────────────────────────────────────────────────
+    def styles(self) -> Mapping[str, StyleConfig]:
+        path = self.config_dir / "styles.json"
+
+        def build(raw: dict | None) -> Mapping[str, StyleConfig]:
+            if raw is None:
+                raise FileNotFoundError(path)
+            fields = StyleConfig.__dataclass_fields__
+            return MappingProxyType({
+                key: StyleConfig(key=key, **{k: v for k, v in cfg.items() if k in fields})
+                for key, cfg in raw.items()
+            })
+        return self._get("styles", (path,), build)
+
+    def style(self, key: str | None) -> StyleConfig:
+        """Style for `key`, falling back to the "default" style."""
+        styles = self.styles()
+        return styles.get(key or "default") or styles.get("default") or StyleConfig(key="default")
+
+    def master(self) -> MasterSettings:
+        def build(raw: dict | None) -> MasterSettings:
+            known, extra = _split(raw or {}, MasterSettings)
+            return MasterSettings(**known, extra=freeze(extra))
+        return self._get("master", (self.config_dir / "master_settings.json",), build)
+
+    def account(self, account: str | Path) -> AccountSettings:
+        """Settings + schedule for an account folder (name or path)."""
+        account_dir = Path(account) if isinstance(account, Path) else self.accounts_dir / account
+
+        def build(raw: dict | None, schedule: dict | None) -> AccountSettings:
+            known, extra = _split(raw or {}, AccountSettings)
+            known.setdefault("account_name", account_dir.name)
+            known["daily_posts"] = max(1, int(known.get("daily_posts", 1)))
+            known["schedule"] = freeze(schedule or {})
+            return AccountSettings(**known, extra=freeze(extra))
+
+        paths = (account_dir / "settings.json", account_dir / "schedule.json")
+        return self._get(("account", account_dir), paths, build)
+
+
+registry = ConfigRegistry()
+
+
+def get_styles() -> Mapping[str, StyleConfig]:
+    return registry.styles()
+
+
+def get_style(key: str | None) -> StyleConfig:
+    return registry.style(key)
+
+
+def get_master_settings() -> MasterSettings:
+    return registry.master()
+
+
+def get_account_settings(account: str | Path) -> AccountSettings:
+    return registry.account(account)
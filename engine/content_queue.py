@@ -1,9 +1,24 @@
 import json
 from datetime import datetime
 from pathlib import Path
-from .utils import BASE_DIR, ensure_dir, log
+from .utils import GENERATED_DIR, ensure_dir, log
+from .config import get_account_settings
+from .metrics import timed
+from .queue_store import get_queue_store
 
 
+def _open_unique(base_dir: Path, stem: str):
+    """Create `<stem>.json`, or `<stem>_2.json`, ... if that second is taken."""
+    n = 1
+    while True:
+        name = f"{stem}.json" if n == 1 else f"{stem}_{n}.json"
+        try:
+            return base_dir / name, open(base_dir / name, "x", encoding="utf-8")
+        except FileExistsError:
+            n += 1
+
+
+@timed("queue_write")
 def save_post_to_queue(
     account_name: str,
     topic: str,
@@ -11,30 +26,50 @@ def save_post_to_queue(
     image_path: Path | None = None,
     video_path: Path | None = None
 ) -> Path:
+    """
+    Enqueue the post in the indexed queue store and write its JSON export
+    under generated/<account>/<date>/ (used by the dashboard and run summary).
+    The image's derivatives (upload JPEG, thumbnail) are recorded as "media".
+    """
+    from .media_prep import derivative_paths
+
     now = datetime.now()
     date_str = now.strftime("%Y-%m-%d")
     time_str = now.strftime("%H%M%S")
+    generated_at = now.isoformat(timespec="seconds")
 
-    base_dir = BASE_DIR / "generated" / account_name / date_str
-    ensure_dir(base_dir)
+    media = derivative_paths(image_path) if image_path else {}
+    store = get_queue_store()
+    queue_id = store.enqueue(
+        account_name, topic, post,
+        image_path=image_path, video_path=video_path,
+        platforms=get_account_settings(account_name).platforms,
+        generated_at=generated_at,
+        extra={"media": media},
+    )
 
-    file_path = base_dir / f"{time_str}.json"
+    base_dir = GENERATED_DIR / account_name / date_str
+    ensure_dir(base_dir)
 
     payload = {
+        "queue_id": queue_id,
         "account": account_name,
         "topic": topic,
-        "generated_at": now.isoformat(timespec="seconds"),
+        "generated_at": generated_at,
         "title": post.get("title"),
         "description": post.get("description"),
         "hashtags": post.get("hashtags", []),
         "status": "ready",
         "platforms": [],
         "image_path": str(image_path) if image_path else None,
-        "video_path": str(video_path) if video_path else None
+        "video_path": str(video_path) if video_path else None,
+        "media": media,
     }
 
-    with open(file_path, "w", encoding="utf-8") as f:
+    file_path, f = _open_unique(base_dir, time_str)
+    with f:
         json.dump(payload, f, indent=2)
+    store.set_json_path(queue_id, file_path)
 
     log(f"[{account_name}] Saved post to queue: {file_path}")
-    return file_path
\ No newline at end of file
+    return file_path
@@ -0,0 +1,233 @@
+"""
+Long-running scheduler daemon.
+
+Instead of a cron tick that re-imports everything and runs every account
+at once, the daemon keeps one warm AccountManager (Airtable session, LLM
+cache, render pool, topic pool) and fires each account at its own slots:
+
+- times listed in `accounts/<name>/schedule.json` (any "HH:MM" lists,
+  e.g. {"pinterest": ["09:00", "18:30"]}), with `daily_posts` split
+  across them;
+- without listed times, `daily_posts` single-post slots spread evenly
+  between `day_start` and `day_end`.
+
+Every slot is shifted by a random ±`jitter_minutes`, so accounts don't
+all hit the APIs at the top of the hour. Slots that already passed when
+the day is planned are skipped; jitter is seeded per account/day/slot,
+so a restart re-plans the same times instead of firing a slot twice.
+SIGTERM/SIGINT stop new slots, let running ones finish and flush
+buffered writes. While waiting for the next slot, the daemon tops up the
+image warm pool (`engine.asset_pool`) in the background, when enabled.
+
+    python run.py --daemon
+"""
+
+import heapq
+import logging
+import random
+import signal
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import date, datetime
+
+from engine import concurrency
+from engine.account_manager import AccountManager
+from engine.asset_pool import get_asset_pool
+from engine.config import AccountSettings, get_account_settings, get_master_settings
+from engine.metrics import metrics, span, write_prometheus
+from engine.scheduler import _process_account
+
+log = logging.getLogger("daemon")
+
+DEFAULT_DAEMON_SETTINGS = {
+    "jitter_minutes": 10,
+    "day_start": "08:00",   # window for accounts without explicit times
+    "day_end": "22:00",
+    "metrics_every_minutes": 5,
+}
+
+
+def daemon_settings() -> dict:
+    return {**DEFAULT_DAEMON_SETTINGS, **get_master_settings().section("daemon")}
+
+
+def parse_hhmm(value: str) -> int:
+    """'09:30' → seconds after midnight."""
+    hours, minutes = value.strip().split(":")
+    seconds = int(hours) * 3600 + int(minutes) * 60
+    if not 0 <= seconds < 86400:
+        raise ValueError(f"time of day out of range: {value!r}")
+    return seconds
+
+
+def account_slots(settings: AccountSettings, day_start: int, day_end: int) -> list[tuple[int, int]]:
+    """`(seconds after midnight, posts)` pairs for one account's day."""
+    posts = settings.daily_posts
+    if posts <= 0:
+        return []
+
+    times = set()
+    for value in settings.schedule.values():
+        if isinstance(value, (list, tuple)):
+            for item in value:
+                try:
+                    times.add(parse_hhmm(str(item)))
+                except ValueError:
+                    log.warning(f"[{settings.account_name}] Ignoring bad schedule time: {item!r}")
+
+    if not times:
+        step = max(0, day_end - day_start) / posts
+        return [(int(day_start + (i + 0.5) * step), 1) for i in range(posts)]
+
+    ordered = sorted(times)
+    base, extra = divmod(posts, len(ordered))
+    slots = [(t, base + (1 if i < extra else 0)) for i, t in enumerate(ordered)]
+    return [(t, n) for t, n in slots if n]
+
+
+class Daemon:
+    def __init__(self, account_manager: AccountManager | None = None):
+        self.settings = daemon_settings()
+        self.account_manager = account_manager
+        self._heap: list[tuple[float, int, str, int]] = []  # (due, seq, account, posts)
+        self._seq = 0
+        self._stop = threading.Event()
+        self._topics_lock = threading.Lock()
+        self._refill: Future | None = None
+        self._slots: set[Future] = set()
+
+    # ──────────────────────────────────────────────────────────
+    def _push(self, due: float, account: str, posts: int) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, account, posts))
+
+    def plan_day(self, day: date, now: float | None = None) -> int:
+        """Queue the remaining slots of `day` for every account; returns the count."""
+        now = time.time() if now is None else now
+        midnight = datetime.combine(day, datetime.min.time()).timestamp()
+        jitter = float(self.settings["jitter_minutes"]) * 60
+        day_start = parse_hhmm(self.settings["day_start"])
+        day_end = parse_hhmm(self.settings["day_end"])
+
+        planned = 0
+        for path in self.account_manager.get_all_accounts():
+            for offset, posts in account_slots(get_account_settings(path), day_start, day_end):
+                rng = random.Random(f"{path.name}|{day.isoformat()}|{offset}")
+                due = midnight + offset + rng.uniform(-jitter, jitter)
+                if due > now:
+                    self._push(due, path.name, posts)
+                    planned += 1
+        # Sentinel: plan the next day just after midnight.
+        self._push(midnight + 86400 + 1, "", 0)
+        log.info(f"Planned {planned} slot(s) for {day.isoformat()}")
+        return planned
+
+    def _ensure_topics(self, account: str, posts: int) -> None:
+        """Re-scan Topics when an account's prefetched pool runs low."""
+        am = self.account_manager
+        with self._topics_lock:
+            if am.topic_pool is None or am.topic_pool.remaining(account) < posts:
+                am.prefetch_topics(am.get_all_accounts())
+
+    def _resume(self) -> None:
+        """
+        Finish topics the run journal still has open (at startup and daily).
+        Running slots are waited for first: their entries aren't stale.
+        """
+        am = self.account_manager
+        if self._slots:
+            log.info(f"Waiting for {len(self._slots)} running slot(s) before the journal resume...")
+            wait(list(self._slots))
+        try:
+            results = am.resume_journal()
+            am.complete_renders(results)
+            am.writer.flush()
+            am.link_records(results)
+        except Exception as e:
+            log.exception(f"Journal resume failed: {e}")
+
+    def _fire(self, account: str, posts: int) -> None:
+        am = self.account_manager
+        path = am.accounts_dir / account
+        if not path.is_dir():
+            log.warning(f"[{account}] Account folder is gone; skipping slot.")
+            return
+        try:
+            with span("slot"):
+                self._ensure_topics(account, posts)
+                results = _process_account(am, path, posts)
+                am.complete_renders(results)
+                am.writer.flush()
+                am.link_records(results)
+        except Exception as e:
+            log.exception(f"[{account}] Slot failed: {e}")
+            return
+        metrics.inc("bot_daemon_slots_total", account=account)
+        log.info(f"[{account}] Slot done: {len(results)} post(s)")
+
+    def _refill_assets(self, executor: ThreadPoolExecutor) -> None:
+        """Start a background asset-pool refill unless one is still running."""
+        pool = get_asset_pool()
+        if pool is None or (self._refill is not None and not self._refill.done()):
+            return
+        accounts = self.account_manager.get_all_accounts()
+        self._refill = executor.submit(pool.refill_accounts, accounts, self._stop)
+
+    # ──────────────────────────────────────────────────────────
+    def stop(self, *_args) -> None:
+        if not self._stop.is_set():
+            log.info("Stop requested; finishing running slots...")
+        self._stop.set()
+
+    def run(self) -> None:
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        limits = concurrency.configure()
+        owns_manager = self.account_manager is None
+        if owns_manager:
+            self.account_manager = AccountManager()
+        self._resume()
+        self.account_manager.prefetch_topics(self.account_manager.get_all_accounts())
+        self.plan_day(date.today())
+
+        export_every = float(self.settings["metrics_every_minutes"]) * 60
+        next_export = time.monotonic() + export_every
+        pool = ThreadPoolExecutor(max_workers=limits["accounts"], thread_name_prefix="slot")
+        refiller = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asset-pool")
+        try:
+            while not self._stop.is_set():
+                wait = self._heap[0][0] - time.time() if self._heap else export_every
+                if wait > 0:
+                    self._refill_assets(refiller)
+                    self._stop.wait(min(wait, max(1.0, next_export - time.monotonic())))
+                    if time.monotonic() >= next_export:
+                        write_prometheus("daemon")
+                        next_export = time.monotonic() + export_every
+                    continue
+
+                due, _, account, posts = heapq.heappop(self._heap)
+                if not account:
+                    self.account_manager.reload_accounts()
+                    self._resume()
+                    self.plan_day(datetime.fromtimestamp(due).date())
+                    continue
+                log.info(f"[{account}] Firing slot ({posts} post(s), {time.time() - due:+.0f}s late)")
+                future = pool.submit(self._fire, account, posts)
+                self._slots.add(future)
+                future.add_done_callback(self._slots.discard)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            refiller.shutdown(wait=True, cancel_futures=True)
+            if owns_manager:
+                self.account_manager.close()
+            else:
+                self.account_manager.writer.flush()
+            write_prometheus("daemon")
+            log.info("Daemon stopped.")
+
+
+def run_daemon() -> None:
+    Daemon().run()
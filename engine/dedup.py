@@ -0,0 +1,248 @@
+"""
+Per-account near-duplicate index over topics and generated posts.
+
+Texts are reduced to shingle sets (character 4-grams for short texts,
+word bigrams otherwise) and then to 32-value MinHash signatures, indexed
+with LSH banding (8 bands × 4 rows). A lookup hashes the query once,
+reads 8 buckets and compares only the candidates found there, so it
+stays well under a millisecond with tens of thousands of entries.
+
+Signatures are persisted in SQLite and added incrementally as posts are
+saved. The first time an account is used, its history is backfilled from
+the queue store. Topics set aside as duplicates are remembered there too,
+so later runs don't claim (or pay the LLM for) them again.
+"""
+
+import random
+import re
+import sqlite3
+import threading
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .config import get_master_settings
+from .metrics import metrics
+from .utils import GENERATED_DIR, ensure_dir, log
+
+DEFAULT_DB = GENERATED_DIR / "dedup.db"
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_MASK32 = 0xFFFFFFFF
+_rng = random.Random(0x5EED)  # fixed, so persisted signatures stay comparable
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+DEFAULT_DEDUP_SETTINGS = {
+    "enabled": True,
+    "topic_threshold": 0.7,  # estimated Jaccard at which a topic counts as a repeat
+    "post_threshold": 0.7,   # same for title + description
+    "topic_status": "Duplicate",  # Airtable Status for skipped topics (null: leave them 'To Use')
+    "skip_days": 30,         # how long a skipped topic still 'To Use' is set aside
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def dedup_settings() -> dict:
+    return {**DEFAULT_DEDUP_SETTINGS, **get_master_settings().section("dedup")}
+
+
+def shingles(text: str) -> set[str]:
+    words = _WORD.findall(text.lower())
+    if len(words) < 6:
+        joined = " ".join(words)
+        return {joined[i:i + 4] for i in range(max(1, len(joined) - 3))} if joined else set()
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def signature(text: str) -> tuple[int, ...] | None:
+    """MinHash signature of `text`, or None if it has no words."""
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(text)]
+    if not hashes:
+        return None
+    return tuple(min((a * h + b) % _PRIME for h in hashes) & _MASK32 for a, b in _PERMS)
+
+
+def similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+class _LSHIndex:
+    def __init__(self):
+        self.refs: list[str] = []
+        self.sigs: list[tuple[int, ...]] = []
+        self.buckets: list[dict[tuple[int, ...], list[int]]] = [{} for _ in range(BANDS)]
+
+    def add(self, ref: str, sig: tuple[int, ...]) -> None:
+        i = len(self.sigs)
+        self.refs.append(ref)
+        self.sigs.append(sig)
+        for band, bucket in enumerate(self.buckets):
+            bucket.setdefault(sig[band * ROWS:(band + 1) * ROWS], []).append(i)
+
+    def best(self, sig: tuple[int, ...]) -> tuple[str | None, float]:
+        candidates = set()
+        for band, bucket in enumerate(self.buckets):
+            candidates.update(bucket.get(sig[band * ROWS:(band + 1) * ROWS], ()))
+        best_ref, best_sim = None, 0.0
+        for i in candidates:
+            sim = similarity(sig, self.sigs[i])
+            if sim > best_sim:
+                best_ref, best_sim = self.refs[i], sim
+        return best_ref, best_sim
+
+
+class DedupIndex:
+    """Topic and post indexes per account ("topic" and "post" kinds)."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB):
+        self.db_path = Path(db_path)
+        ensure_dir(self.db_path.parent)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            "account TEXT NOT NULL, kind TEXT NOT NULL, ref TEXT NOT NULL, sig BLOB NOT NULL, "
+            "PRIMARY KEY (account, kind, ref))"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS backfilled (account TEXT PRIMARY KEY)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS skipped ("
+            "topic_id TEXT PRIMARY KEY, account TEXT NOT NULL, kind TEXT NOT NULL, skipped_at TEXT NOT NULL)"
+        )
+        self._indexes: dict[tuple[str, str], _LSHIndex] = {}
+        self._lock = threading.RLock()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections aren't shareable)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    # ──────────────────────────────────────────────────────────
+    def _index(self, account: str, kind: str) -> _LSHIndex:
+        with self._lock:
+            key = (account, kind)
+            if key not in self._indexes:
+                self._load(account)
+            return self._indexes[key]
+
+    def _load(self, account: str) -> None:
+        conn = self._conn()
+        if conn.execute("SELECT 1 FROM backfilled WHERE account = ?", (account,)).fetchone() is None:
+            self._backfill(account)
+        for kind in ("topic", "post"):
+            self._indexes[(account, kind)] = _LSHIndex()
+        rows = conn.execute("SELECT kind, ref, sig FROM signatures WHERE account = ?", (account,))
+        for kind, ref, blob in rows:
+            self._indexes[(account, kind)].add(ref, tuple(array("I", blob)))
+
+    def _backfill(self, account: str) -> None:
+        from .queue_store import get_queue_store
+
+        history = get_queue_store().account_history(account)
+        rows = []
+        for post in history:
+            for kind, text in (("topic", post["topic"]), ("post", _post_text(post))):
+                sig = signature(text or "")
+                if sig:
+                    rows.append((account, kind, f"queue:{post['id']}", array("I", sig).tobytes()))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("INSERT OR IGNORE INTO signatures VALUES (?, ?, ?, ?)", rows)
+        conn.execute("INSERT OR IGNORE INTO backfilled VALUES (?)", (account,))
+        conn.execute("COMMIT")
+        if history:
+            log(f"[DEDUP] Indexed {len(history)} past post(s) for {account}.")
+
+    def add(self, account: str, kind: str, ref: str, text: str) -> None:
+        sig = signature(text)
+        if sig is None:
+            return
+        with self._lock:
+            index = self._index(account, kind)
+            cur = self._conn().execute(
+                "INSERT OR IGNORE INTO signatures VALUES (?, ?, ?, ?)",
+                (account, kind, ref, array("I", sig).tobytes()),
+            )
+            if cur.rowcount:
+                index.add(ref, sig)
+
+    def match(self, account: str, kind: str, text: str) -> tuple[str | None, float]:
+        """(ref, similarity) of the closest indexed entry; (None, 0.0) if none is close."""
+        sig = signature(text)
+        if sig is None:
+            return None, 0.0
+        index = self._index(account, kind)
+        with self._lock:
+            return index.best(sig)
+
+    # ──────────────────────────────────────────────────────────
+    def is_duplicate_topic(self, account: str, topic: str, threshold: float) -> bool:
+        ref, sim = self.match(account, "topic", topic)
+        if sim >= threshold:
+            metrics.inc("bot_dedup_skips_total", kind="topic")
+            log(f"[{account}] Skipping near-duplicate topic ({sim:.2f} vs {ref}): {topic}")
+            return True
+        return False
+
+    def is_duplicate_post(self, account: str, post: dict, threshold: float) -> bool:
+        ref, sim = self.match(account, "post", _post_text(post))
+        if sim >= threshold:
+            metrics.inc("bot_dedup_skips_total", kind="post")
+            log(f"[{account}] Dropping near-duplicate post ({sim:.2f} vs {ref}): {post.get('title')}")
+            return True
+        return False
+
+    def add_post(self, account: str, ref: str, topic: str, post: dict) -> None:
+        self.add(account, "topic", ref, topic)
+        self.add(account, "post", ref, _post_text(post))
+
+
+    # ──────────────────────────────────────────────────────────
+    def skip_topic(self, account: str, topic_id: str, kind: str) -> None:
+        """Remember a topic set aside as a `kind` ("topic" or "post") duplicate."""
+        self._conn().execute(
+            "INSERT OR REPLACE INTO skipped VALUES (?, ?, ?, ?)",
+            (topic_id, account, kind, datetime.now().isoformat(timespec="seconds")),
+        )
+
+    def skipped_ids(self) -> set[str]:
+        return {r[0] for r in self._conn().execute("SELECT topic_id FROM skipped")}
+
+    def unskip(self, topic_ids: list[str]) -> None:
+        """Forget skipped topics (e.g. once Airtable no longer lists them as 'To Use')."""
+        self._conn().executemany("DELETE FROM skipped WHERE topic_id = ?", [(t,) for t in topic_ids])
+
+    def prune_skipped(self, days: int = 30) -> int:
+        """Forget topics skipped more than `days` ago, so they are judged afresh; returns how many."""
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+        cur = self._conn().execute("DELETE FROM skipped WHERE skipped_at < ?", (cutoff,))
+        return cur.rowcount
+
+
+def _post_text(post: dict) -> str:
+    return f"{post.get('title') or ''} {post.get('description') or ''}"
+
+
+_index: DedupIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_dedup_index() -> DedupIndex | None:
+    """The process-wide index, or None when `dedup.enabled` is off."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            if not dedup_settings()["enabled"]:
+                return None
+            _index = DedupIndex()
+        return _index
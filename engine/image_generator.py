@@ -1,31 +1,67 @@
-import os
-import base64
+import time
 from datetime import datetime
 from pathlib import Path
-from openai import OpenAI
 
-from .utils import BASE_DIR, ensure_dir, log, load_json
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from .utils import GENERATED_DIR, ensure_dir, log, reserve_path
+from .config import get_master_settings, get_style
+from .concurrency import backend_slot
+from .openai_client import get_openai_client
+from .asset_pool import get_asset_pool
+from .metrics import metrics, timed
 
 
 def get_image_style(style_key: str | None):
-    styles = load_json(BASE_DIR / "config" / "styles.json")
-    key = style_key or "default"
-    style_cfg = styles.get(key, styles.get("default"))
-    return style_cfg.get("image_style", "clean, bright, simple background")
+    return get_style(style_key).image_style
+
+
+def request_images(prompt: str, n: int = 1) -> list[str]:
+    """One images API call for `n` variants of `prompt`; returns their base64 payloads."""
+    with backend_slot("openai"):
+        start = time.perf_counter()
+        response = get_openai_client().images.generate(
+            model="gpt-image-1-mini",
+            prompt=prompt,
+            size="1024x1536",
+            n=n
+        )
+        metrics.observe("bot_external_seconds", time.perf_counter() - start, service="openai", method="images")
+    return [item.b64_json for item in response.data]
+
 
+def write_image(b64_data: str, path: Path, video: bool | None = None) -> Path:
+    """
+    Decode an images API payload to `path` and write its derivatives in the
+    same pass (see `media_prep`). `video` defaults to `media.videos`.
+    """
+    from .media_prep import write_derivatives, write_image_b64
 
+    digest = write_image_b64(b64_data, path)
+    if video is None:
+        video = bool(get_master_settings().section("media").get("videos", False))
+    try:
+        write_derivatives(path, digest, video=video)
+    except Exception as e:
+        log(f"[IMAGE] Derivatives failed for {path.name}: {e}")
+    return path
+
+
+@timed("image_generate")
 def generate_image_for_post(account_name: str, topic: str, post: dict, style_key: str | None = None) -> Path | None:
+    img_path = None
     try:
         now = datetime.now()
         date_str = now.strftime("%Y-%m-%d")
         time_str = now.strftime("%H%M%S")
 
-        out_dir = BASE_DIR / "generated" / account_name / date_str
+        out_dir = GENERATED_DIR / account_name / date_str
         ensure_dir(out_dir)
 
-        img_path = out_dir / f"{time_str}_image.png"
+        img_path = reserve_path(out_dir, time_str, "_image.png")
+
+        pool = get_asset_pool()
+        if pool is not None and pool.take(account_name, style_key, img_path):
+            log(f"[{account_name}] Image taken from the asset pool: {img_path}")
+            return img_path
 
         title = post.get("title", topic)
         description = post.get("description", "")
@@ -47,22 +83,14 @@ def generate_image_for_post(account_name: str, topic: str, post: dict, style_key
 
         log(f"[{account_name}] Generating image for topic: {topic}")
 
-        response = client.images.generate(
-            model="gpt-image-1-mini",
-            prompt=prompt,
-            size="1024x1536",
-            n=1
-        )
-
-        b64_data = response.data[0].b64_json
-        img_bytes = base64.b64decode(b64_data)
-
-        with open(img_path, "wb") as f:
-            f.write(img_bytes)
+        write_image(request_images(prompt)[0], img_path)
 
         log(f"[{account_name}] Image saved: {img_path}")
         return img_path
 
     except Exception as e:
+        metrics.inc("bot_stage_errors_total", stage="image_generate")
+        if img_path is not None and img_path.exists() and not img_path.stat().st_size:
+            img_path.unlink()  # the empty placeholder from reserve_path
         log(f"[{account_name}] Image generation FAILED for '{topic}': {e}")
         return None
@@ -0,0 +1,114 @@
+"""
+Topic leases: which replica is working on which topic, and until when.
+
+A replica must hold a topic's lease before generating for it. Leases
+expire after `lease_seconds`, so a crashed replica's topics are reclaimed
+by the next one that asks; a topic whose post is saved gets a long
+"done" lease so a stale topic list can't hand it out again.
+
+Stores are pluggable through LEASE_STORES (`sharding.lease_store`); the
+SQLite store works for replicas sharing a volume and for local testing.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Protocol
+
+from .utils import DATA_DIR, ensure_dir
+
+DONE_TTL = 7 * 86400  # keep finished topics leased this long
+
+
+class LeaseStore(Protocol):
+    """What a lease backend provides."""
+
+    def acquire(self, topic_ids: list[str], owner: str, ttl: float) -> list[str]:
+        """Lease whichever of `topic_ids` are free (or expired, or already ours); return those."""
+        ...
+
+    def release(self, topic_ids: list[str], owner: str) -> None:
+        """Give up leases we hold, e.g. after a failed generation."""
+        ...
+
+    def complete(self, topic_ids: list[str], owner: str) -> None:
+        """The topic is done; keep it leased for DONE_TTL."""
+        ...
+
+
+class SQLiteLeaseStore:
+    def __init__(self, db_path: Path = DATA_DIR / "leases.db"):
+        self.db_path = Path(db_path)
+        ensure_dir(self.db_path.parent)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            "topic_id TEXT PRIMARY KEY, claimed_by TEXT NOT NULL, lease_expiry REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_leases_expiry ON leases (lease_expiry)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections aren't shareable)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, topic_ids: list[str], owner: str, ttl: float) -> list[str]:
+        now = time.time()
+        conn = self._conn()
+        acquired = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for topic_id in topic_ids:
+                cur = conn.execute(
+                    "INSERT INTO leases (topic_id, claimed_by, lease_expiry) VALUES (?, ?, ?) "
+                    "ON CONFLICT(topic_id) DO UPDATE SET claimed_by = excluded.claimed_by, "
+                    "lease_expiry = excluded.lease_expiry "
+                    "WHERE leases.lease_expiry < ? OR leases.claimed_by = excluded.claimed_by",
+                    (topic_id, owner, now + ttl, now),
+                )
+                if cur.rowcount:
+                    acquired.append(topic_id)
+            conn.execute("DELETE FROM leases WHERE lease_expiry < ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return acquired
+
+    def release(self, topic_ids: list[str], owner: str) -> None:
+        self._conn().executemany(
+            "DELETE FROM leases WHERE topic_id = ? AND claimed_by = ?",
+            [(t, owner) for t in topic_ids],
+        )
+
+    def complete(self, topic_ids: list[str], owner: str) -> None:
+        self._conn().executemany(
+            "UPDATE leases SET lease_expiry = ? WHERE topic_id = ? AND claimed_by = ?",
+            [(time.time() + DONE_TTL, t, owner) for t in topic_ids],
+        )
+
+
+LEASE_STORES = {"sqlite": SQLiteLeaseStore}
+
+_store: LeaseStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_lease_store() -> LeaseStore | None:
+    """The configured lease store (`sharding.lease_store`), or None for "none"."""
+    global _store
+    from .sharding import sharding_settings
+
+    with _store_lock:
+        if _store is None:
+            kind = sharding_settings()["lease_store"]
+            if kind in (None, "none"):
+                return None
+            _store = LEASE_STORES[kind]()
+        return _store
@@ -0,0 +1,150 @@
+"""
+On-disk, content-addressed cache for LLM responses.
+
+Entries are keyed on a hash of (model, prompt, style text) and stored as
+one JSON file each under cache/llm/. The cache is bounded by entry count
+and total bytes with LRU eviction, and entries expire after `ttl` seconds.
+Set LLM_CACHE_BYPASS=1 (or pass `bypass=True`) to skip it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from .config import get_master_settings
+from .metrics import metrics
+from .utils import CACHE_DIR, ensure_dir, load_json, log
+
+DEFAULT_DIR = CACHE_DIR / "llm"
+
+
+def cache_key(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        data = (part or "").encode("utf-8")
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class LLMCache:
+    def __init__(
+        self,
+        cache_dir: Path = DEFAULT_DIR,
+        max_entries: int = 5000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 7 * 24 * 3600,
+        bypass: bool = False,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bypass = bypass or os.getenv("LLM_CACHE_BYPASS", "") not in ("", "0", "false")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index: OrderedDict[str, int] | None = None  # key -> size, LRU order
+        self._bytes = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> None:
+        if self._index is not None:
+            return
+        entries = []
+        if self.cache_dir.exists():
+            for f in self.cache_dir.glob("*/*.json"):
+                st = f.stat()
+                entries.append((st.st_mtime, f.stem, st.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._bytes = sum(self._index.values())
+
+    def _drop(self, key: str) -> None:
+        self._bytes -= self._index.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    # ──────────────────────────────────────────────────────────
+    def get(self, key: str) -> str | None:
+        if self.bypass:
+            return None
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            if key not in self._index:
+                self.misses += 1
+                metrics.inc("bot_llm_cache_total", result="miss")
+                return None
+            try:
+                entry = load_json(path)
+            except (OSError, ValueError):
+                self._drop(key)
+                self.misses += 1
+                metrics.inc("bot_llm_cache_total", result="miss")
+                return None
+            if time.time() - entry.get("created_at", 0) > self.ttl:
+                self._drop(key)
+                self.misses += 1
+                metrics.inc("bot_llm_cache_total", result="miss")
+                return None
+            self._index.move_to_end(key)
+            os.utime(path)  # persist recency for the next process
+            self.hits += 1
+            metrics.inc("bot_llm_cache_total", result="hit")
+            return entry["value"]
+
+    def put(self, key: str, value: str) -> None:
+        if self.bypass:
+            return
+        with self._lock:
+            self._load_index()
+            path = self._path(key)
+            ensure_dir(path.parent)
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"created_at": time.time(), "value": value}, f)
+            os.replace(tmp, path)
+
+            self._bytes -= self._index.pop(key, 0)
+            self._index[key] = path.stat().st_size
+            self._bytes += self._index[key]
+            while self._index and (len(self._index) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._index)))
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._index or ()),
+                "bytes": self._bytes,
+            }
+
+
+_cache: LLMCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> LLMCache:
+    """Shared cache configured from the `llm_cache` block of master_settings.json."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            cfg = get_master_settings().llm_cache
+            _cache = LLMCache(
+                max_entries=int(cfg.get("max_entries", 5000)),
+                max_bytes=int(cfg.get("max_mb", 64)) * 1024 * 1024,
+                ttl=float(cfg.get("ttl_hours", 168)) * 3600,
+                bypass=not cfg.get("enabled", True),
+            )
+            log(f"[LLM CACHE] {'disabled' if _cache.bypass else f'using {_cache.cache_dir}'}")
+        return _cache
@@ -0,0 +1,116 @@
+"""
+Upload-ready media derivatives.
+
+Pinterest accepts large images, but every extra byte is upload latency.
+`upload_jpeg` writes a size-optimised progressive JPEG next to the source
+(<name>_upload.jpg, at most 1000×1500 by default) and reuses it on later
+calls while it is newer than the source.
+
+New images go through `write_image_b64` and `write_derivatives` instead:
+the API's base64 payload is decoded to disk in chunks, then the pixels are
+decoded once to produce every derivative in one pass — the upload JPEG,
+a dashboard thumbnail (<name>_thumb.jpg) and, with videos on, the 9:16
+video background in the render cache. Consumers find them by name
+(`derivative_paths`), so nothing re-decodes the full-size PNG.
+"""
+
+import base64
+import hashlib
+from pathlib import Path
+
+from PIL import Image
+
+UPLOAD_MAX_SIZE = (1000, 1500)
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+THUMB_SIZE = (240, 360)
+B64_CHUNK = 1 << 20  # base64 characters per decode step (a multiple of 4)
+
+DERIVATIVE_SUFFIXES = {"upload": "_upload.jpg", "thumbnail": "_thumb.jpg"}
+
+
+def _save_upload_jpeg(img: Image.Image, out: Path, max_size: tuple[int, int], quality: int, max_bytes: int) -> Path:
+    img = img.copy()
+    img.thumbnail(max_size, Image.LANCZOS)
+
+    tmp = out.with_suffix(".tmp")
+    # Step quality down until the file fits the byte budget.
+    for q in range(quality, 40, -10):
+        img.save(tmp, format="JPEG", quality=q, optimize=True, progressive=True)
+        if tmp.stat().st_size <= max_bytes:
+            break
+    tmp.replace(out)
+    return out
+
+
+def upload_jpeg(
+    image_path: Path,
+    max_size: tuple[int, int] = UPLOAD_MAX_SIZE,
+    quality: int = 85,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+) -> Path:
+    image_path = Path(image_path)
+    out = image_path.with_name(f"{image_path.stem}{DERIVATIVE_SUFFIXES['upload']}")
+    if out.exists() and out.stat().st_mtime >= image_path.stat().st_mtime:
+        return out
+
+    with Image.open(image_path) as src:
+        img = src.convert("RGB")
+    return _save_upload_jpeg(img, out, max_size, quality, max_bytes)
+
+
+# ──────────────────────────────────────────────────────────
+def write_image_b64(b64_data: str, path: Path, chunk_chars: int = B64_CHUNK) -> str:
+    """Decode `b64_data` into `path` a chunk at a time; returns the file's sha256."""
+    digest = hashlib.sha256()
+    with open(path, "wb") as f:
+        for start in range(0, len(b64_data), chunk_chars):
+            chunk = base64.b64decode(b64_data[start:start + chunk_chars])
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+
+def derivative_paths(image_path: Path | str) -> dict[str, str]:
+    """The derivatives already written next to `image_path`, by kind."""
+    image_path = Path(image_path)
+    found = {}
+    for kind, suffix in DERIVATIVE_SUFFIXES.items():
+        path = image_path.with_name(f"{image_path.stem}{suffix}")
+        if path.exists():
+            found[kind] = str(path)
+    return found
+
+
+def write_derivatives(image_path: Path, digest: str | None = None, video: bool = False) -> dict[str, str]:
+    """
+    Decode `image_path` once and write its upload JPEG and thumbnail (and the
+    9:16 video background, if `video`). `digest` is the file's sha256 when
+    the caller already has it. Returns the derivative paths by kind.
+    """
+    image_path = Path(image_path)
+    with Image.open(image_path) as src:
+        img = src.convert("RGB")
+
+    paths = {
+        "upload": str(_save_upload_jpeg(
+            img, image_path.with_name(f"{image_path.stem}{DERIVATIVE_SUFFIXES['upload']}"),
+            UPLOAD_MAX_SIZE, 85, UPLOAD_MAX_BYTES,
+        )),
+    }
+
+    thumb = img.copy()
+    thumb.thumbnail(THUMB_SIZE, Image.LANCZOS)
+    thumb_path = image_path.with_name(f"{image_path.stem}{DERIVATIVE_SUFFIXES['thumbnail']}")
+    thumb.save(thumb_path, format="JPEG", quality=80, optimize=True)
+    paths["thumbnail"] = str(thumb_path)
+
+    if video:
+        from .render_cache import file_digest, get_render_cache
+        from .video_frames import cover_crop
+        from .video_generator import FINAL_SIZE
+
+        digest = digest or file_digest(image_path)
+        paths["video_background"] = str(
+            get_render_cache().put_background(digest, cover_crop(img, FINAL_SIZE), FINAL_SIZE)
+        )
+    return paths
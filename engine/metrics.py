@@ -0,0 +1,202 @@
+"""
+Lightweight in-process metrics: counters, histograms and timing spans.
+
+    with span("llm_generate", account=name):
+        ...
+
+    @timed("queue_write")
+    def save_post_to_queue(...): ...
+
+Stage durations land in the `bot_stage_seconds` histogram (labelled by
+stage), failures in `bot_stage_errors_total`. `write_prometheus()` writes
+a node-exporter textfile and `write_run_report()` a JSON report with
+p50/p95 per series.
+"""
+
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from .utils import DATA_DIR, ensure_dir
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+RESERVOIR = 2048  # samples kept per histogram series for quantiles
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "sum", "samples")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.samples: list[float] = []
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        if len(self.samples) < RESERVOIR:
+            self.samples.append(value)
+        else:
+            j = random.randrange(self.count)
+            if j < RESERVOIR:
+                self.samples[j] = value
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[Labels, float]] = {}
+        self._histograms: dict[str, dict[Labels, _Histogram]] = {}
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._histograms.setdefault(name, {}).setdefault(key, _Histogram()).observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+
+    # ──────────────────────────────────────────────────────────
+    def snapshot(self) -> dict:
+        """Plain-dict view: counters and histogram count/sum/p50/p95 per series."""
+        def name_of(labels: Labels) -> str:
+            return ",".join(f"{k}={v}" for k, v in labels) or "_"
+
+        with self._lock:
+            return {
+                "counters": {
+                    name: {name_of(k): v for k, v in series.items()}
+                    for name, series in self._counters.items()
+                },
+                "histograms": {
+                    name: {
+                        name_of(k): {
+                            "count": h.count,
+                            "sum": h.sum,
+                            "p50": h.quantile(0.5),
+                            "p95": h.quantile(0.95),
+                        }
+                        for k, h in series.items()
+                    }
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def prometheus_text(self) -> str:
+        def fmt(labels: Labels, extra: tuple = ()) -> str:
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in series.items():
+                    lines.append(f"{name}{fmt(labels)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, h in series.items():
+                    for bound, count in zip(BUCKETS, h.counts):
+                        lines.append(f"{name}_bucket{fmt(labels, (('le', str(bound)),))} {count}")
+                    lines.append(f"{name}_bucket{fmt(labels, (('le', '+Inf'),))} {h.count}")
+                    lines.append(f"{name}_sum{fmt(labels)} {h.sum}")
+                    lines.append(f"{name}_count{fmt(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+inc = metrics.inc
+observe = metrics.observe
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """Time a pipeline stage; errors are counted and re-raised."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        metrics.inc("bot_stage_errors_total", stage=stage, **labels)
+        raise
+    finally:
+        metrics.observe("bot_stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+
+def timed(stage: str):
+    """Decorator form of `span`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# ──────────────────────────────────────────────────────────
+METRICS_DIR = DATA_DIR / "metrics"
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    ensure_dir(path.parent)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_prometheus(job: str = "run", path: Path | None = None) -> Path:
+    """Write `<job>.prom` for node-exporter's textfile collector."""
+    path = path or METRICS_DIR / f"{job}.prom"
+    _atomic_write(path, metrics.prometheus_text())
+    return path
+
+
+def write_run_report(summary: dict | None = None, path: Path | None = None) -> Path:
+    """Write a JSON report for this run (metrics snapshot + caller summary)."""
+    now = datetime.now()
+    path = path or METRICS_DIR / f"run_{now.strftime('%Y%m%d_%H%M%S')}.json"
+    report = {
+        "started_at": datetime.fromtimestamp(metrics.started_at).isoformat(timespec="seconds"),
+        "finished_at": now.isoformat(timespec="seconds"),
+        "duration_s": time.time() - metrics.started_at,
+        **(summary or {}),
+        **metrics.snapshot(),
+    }
+    _atomic_write(path, json.dumps(report, indent=2, default=str))
+    return path
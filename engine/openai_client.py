@@ -0,0 +1,24 @@
+"""
+Shared, lazily constructed OpenAI client.
+
+Importing the `openai` package and building its HTTP client is a large
+share of startup time, so nothing does it until the first API call.
+"""
+
+import os
+import threading
+
+_client = None
+_lock = threading.Lock()
+
+
+def get_openai_client():
+    """Return the process-wide `OpenAI` client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                from openai import OpenAI
+
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
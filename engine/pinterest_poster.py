@@ -1,39 +1,273 @@
+import argparse
+import base64
+import io
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import requests
-from engine.airtable_client import airtable_get, airtable_update
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from engine.airtable_client import TokenBucket, airtable_iter, airtable_update
+from engine.airtable_mirror import get_mirror
+from engine.airtable_writer import AirtableWriteBuffer
+from engine.config import get_master_settings
+from engine.leases import LeaseStore, SQLiteLeaseStore, get_lease_store
+from engine.metrics import metrics, span, write_prometheus
+from engine.queue_store import get_queue_store
+from engine.sharding import worker_id
 from engine.utils import log
 
 # Load credentials from environment
 PINTEREST_ACCESS_TOKEN = os.getenv("PINTEREST_ACCESS_TOKEN")
 PINTEREST_BOARD_ID = os.getenv("PINTEREST_BOARD_ID")
+PINTEREST_API_URL = os.getenv("PINTEREST_API_URL", "https://api.pinterest.com/v5")
+
+DEFAULT_PINTEREST_SETTINGS = {
+    "rate_per_sec": 1.0,  # sustained pin creates per second
+    "workers": 4,         # concurrent publishes in drain mode
+    "max_retries": 4,
+    "prefer_video": True,  # pin the rendered video when the post has one
+    "fallback_image_url": None,  # opt-in image URL for posts without local media (else parked)
+    "no_media_status": "needs_media",  # Status for ready posts with no media (null: leave them ready)
+    "video_poll_timeout": 300,
+}
+PUBLISH_LEASE_SECONDS = 1800  # a claimed post is left alone this long by other drains
+
+
+def pinterest_settings() -> dict:
+    return {**DEFAULT_PINTEREST_SETTINGS, **get_master_settings().section("pinterest")}
+
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+
+
+def _not_sent(exc: requests.RequestException) -> bool:
+    """True if the request failed before any of it reached the server."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(exc, requests.ConnectionError) and isinstance(reason, NewConnectionError)
+
+
+class PinterestClient:
+    """
+    Keep-alive Pinterest session with a shared rate limiter and Retry-After
+    handling. Idempotent requests are retried on 429, 5xx and connection
+    errors; a POST only on 429 or when it never left this host, since a 5xx
+    on POST /pins may still have created the pin.
+    """
+
+    def __init__(self, access_token: str | None = None, rate_per_sec: float = 1.0, max_retries: int = 4):
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_per_sec)
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=16))
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=16))
+        self.session.headers.update({
+            "Authorization": f"Bearer {access_token or PINTEREST_ACCESS_TOKEN}",
+            "Content-Type": "application/json"
+        })
+        # Set while a 429 cool-down is in effect so every worker backs off.
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _wait_for_cooldown(self) -> None:
+        with self._lock:
+            delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def post(self, path: str, payload: dict) -> requests.Response:
+        return self.request("POST", path, json=payload)
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        res = None
+        kwargs.setdefault("timeout", 60)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_cooldown()
+            self.bucket.acquire()
+            start = time.perf_counter()
+            try:
+                res = self.session.request(method, f"{PINTEREST_API_URL}{path}", **kwargs)
+            except requests.RequestException as e:
+                metrics.inc("bot_external_requests_total", service="pinterest", method=method, outcome="error")
+                if attempt == self.max_retries or not (
+                    _not_sent(e) or (idempotent and isinstance(e, requests.ConnectionError))
+                ):
+                    raise
+                delay = min(60.0, 2.0 ** attempt)
+                log(f"[Pinterest] {type(e).__name__}; retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+                continue
+            metrics.observe("bot_external_seconds", time.perf_counter() - start, service="pinterest", method=method)
+            metrics.inc("bot_external_requests_total", service="pinterest", method=method, outcome=str(res.status_code))
+            retryable = res.status_code == 429 or (idempotent and res.status_code >= 500)
+            if not retryable or attempt == self.max_retries:
+                return res
+            try:
+                delay = float(res.headers.get("Retry-After", ""))
+            except ValueError:
+                delay = min(60.0, 2.0 ** attempt)
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            log(f"[Pinterest] {res.status_code}; retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+        return res
+
+
+_client: PinterestClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> PinterestClient:
+    """The process-wide client; one instance, so every worker shares its rate limit."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            settings = pinterest_settings()
+            _client = PinterestClient(rate_per_sec=float(settings["rate_per_sec"]), max_retries=int(settings["max_retries"]))
+        return _client
+
 
 def get_ready_post():
     """Fetch the first post marked 'ready' in Airtable."""
-    recs = airtable_get("Posts?filterByFormula=Status='ready'")
-    if recs:
-        log(f"[Pinterest] Found {len(recs)} ready post(s).")
-        return recs[0]
+    for rec in get_ready_posts(1):
+        log("[Pinterest] Found a ready post.")
+        return rec
     log("[Pinterest] No ready posts found.")
     return None
 
 
-def post_to_pinterest(title: str, description: str, image_url: str):
-    """Post a pin to Pinterest board."""
-    url = "https://api.pinterest.com/v5/pins"
-    headers = {
-        "Authorization": f"Bearer {PINTEREST_ACCESS_TOKEN}",
-        "Content-Type": "application/json"
-    }
+def get_ready_posts(limit: int) -> list[dict]:
+    """Fetch up to `limit` posts marked 'ready' in Airtable (oldest first)."""
+    mirror = get_mirror()
+    # A stale mirror could hand out posts that were already published.
+    recs = mirror.fresh_records("Posts", limit=limit, Status="ready") if mirror else None
+    if recs is not None:
+        return recs
+    return list(airtable_iter(
+        "Posts", formula="Status='ready'", page_size=min(limit, 100), max_records=limit,
+    ))
+
+
+class _MultipartFile:
+    """
+    multipart/form-data body that streams its file part from disk, so a
+    video upload never has to sit in memory. requests reads it in blocks
+    and takes Content-Length from __len__.
+    """
+
+    def __init__(self, fields: dict, file_path: Path, content_type: str, field_name: str = "file"):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        head = b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+            for k, v in fields.items()
+        )
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field_name}"; '
+            f'filename="{file_path.name}"\r\nContent-Type: {content_type}\r\n\r\n'
+        ).encode()
+        tail = f"\r\n--{boundary}--\r\n".encode()
+        self._length = len(head) + file_path.stat().st_size + len(tail)
+        self._parts = [io.BytesIO(head), open(file_path, "rb"), io.BytesIO(tail)]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        out = b""
+        while self._parts and (size < 0 or len(out) < size):
+            chunk = self._parts[0].read(-1 if size < 0 else size - len(out))
+            if chunk:
+                out += chunk
+            else:
+                self._parts.pop(0).close()
+        return out
+
+    def close(self) -> None:
+        for part in self._parts:
+            part.close()
+        self._parts = []
+
+
+def upload_video(video_path: Path) -> str | None:
+    """Register a video with Pinterest, stream it up, and wait until it's processed."""
+    client = get_client()
+    res = client.post("/media", {"media_type": "video"})
+    if res.status_code not in (200, 201):
+        log(f"[Pinterest] ❌ Media registration failed: {res.status_code} {res.text}")
+        return None
+    media = res.json()
+
+    body = _MultipartFile(media["upload_parameters"], Path(video_path), "video/mp4")
+    try:
+        # Presigned upload URL: plain request, no Pinterest auth header.
+        with span("video_upload"):
+            up = requests.post(media["upload_url"], data=body, headers={"Content-Type": body.content_type}, timeout=600)
+    finally:
+        body.close()
+    if up.status_code not in (200, 201, 204):
+        log(f"[Pinterest] ❌ Video upload failed: {up.status_code} {up.text[:300]}")
+        return None
+
+    deadline = time.monotonic() + float(pinterest_settings()["video_poll_timeout"])
+    while time.monotonic() < deadline:
+        status = client.request("GET", f"/media/{media['media_id']}").json().get("status")
+        if status == "succeeded":
+            return media["media_id"]
+        if status == "failed":
+            log(f"[Pinterest] ❌ Video processing failed for {video_path}")
+            return None
+        time.sleep(2)
+    log(f"[Pinterest] ❌ Video processing timed out for {video_path}")
+    return None
+
+
+def media_source_for(image_path: str | None, video_path: str | None, upload_path: str | None = None) -> dict | None:
+    """
+    Build the pin's media_source from local assets (video or compressed JPEG).
+    `upload_path` is the upload JPEG recorded in the queue, if any.
+    """
+    from engine.media_prep import upload_jpeg
+
+    settings = pinterest_settings()
+    if video_path and Path(video_path).exists() and settings["prefer_video"]:
+        media_id = upload_video(Path(video_path))
+        if media_id:
+            return {"source_type": "video_id", "media_id": media_id, "cover_image_key_frame_time": 1}
+    if upload_path and Path(upload_path).exists():
+        jpeg = Path(upload_path)
+    elif image_path and Path(image_path).exists():
+        jpeg = upload_jpeg(Path(image_path))
+    else:
+        jpeg = None
+    if jpeg is not None:
+        return {
+            "source_type": "image_base64",
+            "content_type": "image/jpeg",
+            "data": base64.b64encode(jpeg.read_bytes()).decode("ascii"),
+        }
+    if settings["fallback_image_url"]:
+        return {"source_type": "image_url", "url": settings["fallback_image_url"]}
+    return None
+
+
+def post_to_pinterest(title: str, description: str, image_url: str | None = None, media_source: dict | None = None):
+    """Post a pin to Pinterest board (from `media_source`, or an image URL)."""
     payload = {
         "board_id": PINTEREST_BOARD_ID,
         "title": title,
         "description": description,
-        "media_source": {
+        "media_source": media_source or {
             "source_type": "image_url",
             "url": image_url
         }
     }
-    res = requests.post(url, headers=headers, json=payload)
+    res = get_client().post("/pins", payload)
     if res.status_code not in (200, 201):
         log(f"[Pinterest] ❌ Failed to post: {res.status_code} {res.text}")
         return None
@@ -41,26 +275,154 @@ def post_to_pinterest(title: str, description: str, image_url: str):
     return res.json()
 
 
+def _publish(post: dict):
+    fields = post["fields"]
+    title = fields.get("Title", "Untitled Post")
+    description = fields.get("Description", "")
+    hashtags = fields.get("Hashtags", "")
+
+    with span("pin_publish"):
+        queued = get_queue_store().find_by_airtable_id(post["id"]) or {}
+        media_source = media_source_for(
+            queued.get("image_path"), queued.get("video_path"), (queued.get("media") or {}).get("upload"),
+        )
+        if media_source is None:
+            _park_without_media(post, title)
+            return None
+
+        log(f"[Pinterest] Preparing to post: {title}")
+        pin = post_to_pinterest(title, f"{description}\n\n{hashtags}", media_source=media_source)
+    metrics.inc("bot_pins_total", outcome="posted" if pin else "failed")
+    if pin and queued:
+        get_queue_store().mark_posted(queued["id"], "pinterest")
+    return pin
+
+
+def _park_without_media(post: dict, title: str) -> None:
+    """
+    Move a ready post we have no media for (made on another replica, or
+    before media was recorded) out of the ready set, so it isn't picked
+    first on every run. Set it back to 'ready' once it has media.
+    """
+    metrics.inc("bot_pins_total", outcome="no_media")
+    status = pinterest_settings()["no_media_status"]
+    if status and airtable_update("Posts", post["id"], {"Status": status}):
+        log(f"[Pinterest] No media for: {title}; marked '{status}'.")
+    else:
+        log(f"[Pinterest] No media for: {title}; skipping.")
+
+
+def _publish_leases() -> LeaseStore:
+    """
+    Where publishers claim posts: the shared lease store, or a local one
+    when leases are off. Each publish call uses its own owner id, so two
+    drains in one process don't share claims.
+    """
+    return get_lease_store() or SQLiteLeaseStore()
+
+
+def claim_posts(posts: list[dict], leases: LeaseStore, owner: str) -> list[dict]:
+    """
+    Lease `posts` before publishing, so overlapping publishers (a cron drain
+    and the daemon, say) never pin the same one. Returns those we got.
+    """
+    claimed = set(leases.acquire([p["id"] for p in posts], owner, PUBLISH_LEASE_SECONDS))
+    if len(claimed) < len(posts):
+        log(f"[Pinterest] {len(posts) - len(claimed)} ready post(s) are claimed by another publisher.")
+    return [p for p in posts if p["id"] in claimed]
+
+
+def _mark_failed(post_id: str) -> None:
+    """
+    Pinned, but still 'ready' in Airtable. The post keeps only its publish
+    claim (not a done lease, which would hide it for DONE_TTL and then let
+    it be pinned again unnoticed), so this needs fixing by hand.
+    """
+    metrics.inc("bot_stage_errors_total", stage="pin_mark_posted")
+    log(f"[Pinterest] ❌ Pinned {post_id} but couldn't mark it posted; set its Status by hand.")
+
+
+def _posted_marked(leases: LeaseStore, owner: str, post_id: str, future) -> None:
+    """The batched 'posted' update landed (or failed): finish the post's lease."""
+    if future.exception() is None:
+        leases.complete([post_id], owner)
+    else:
+        _mark_failed(post_id)
+
+
 def run_pinterest_post():
     """Main Pinterest posting process."""
     post = get_ready_post()
     if not post:
         return
+    leases, owner = _publish_leases(), f"{worker_id()}/pin-{uuid.uuid4().hex[:8]}"
+    if not claim_posts([post], leases, owner):
+        return
 
-    fields = post["fields"]
-    title = fields.get("Title", "Untitled Post")
-    description = fields.get("Description", "")
-    hashtags = fields.get("Hashtags", "")
+    pin = _publish(post)
+    if pin:
+        title = post["fields"].get("Title", "Untitled Post")
+        if airtable_update("Posts", post["id"], {"Status": "posted"}):
+            leases.complete([post["id"]], owner)
+            log(f"[Pinterest] Marked as posted in Airtable: {title}")
+        else:
+            _mark_failed(post["id"])
+    else:
+        leases.release([post["id"]], owner)
 
-    # TODO: Replace this placeholder with your generated image logic
-    image_url = "https://picsum.photos/800/600"
 
-    log(f"[Pinterest] Preparing to post: {title}")
-    pin = post_to_pinterest(title, f"{description}\n\n{hashtags}", image_url)
-    if pin:
-        airtable_update("Posts", post["id"], {"Status": "posted"})
-        log(f"[Pinterest] Marked as posted in Airtable: {title}")
+def drain_pinterest_posts(max_pins: int = 50, deadline: float | None = None, workers: int | None = None) -> int:
+    """
+    Publish up to `max_pins` ready posts concurrently, stopping new publishes
+    once `deadline` seconds have passed. Successes are marked 'posted' in
+    batched Airtable updates. Returns the number of pins created.
+    """
+    started = time.monotonic()
+    leases, owner = _publish_leases(), f"{worker_id()}/pin-{uuid.uuid4().hex[:8]}"
+    posts = claim_posts(get_ready_posts(max_pins), leases, owner)
+    if not posts:
+        log("[Pinterest] No ready posts found.")
+        return 0
+    workers = workers or int(pinterest_settings()["workers"])
+    log(f"[Pinterest] Draining {len(posts)} ready post(s) with {workers} worker(s).")
+
+    def publish(post: dict):
+        done = None
+        if deadline is None or time.monotonic() - started <= deadline:
+            try:
+                done = post if _publish(post) else None
+            except requests.RequestException as e:
+                log(f"[Pinterest] ❌ Request error for {post['id']}: {e}")
+        # Posted: stays claimed until its 'posted' update lands (see
+        # _posted_marked). Otherwise (failed, or out of budget) it's up for
+        # the next drain.
+        if not done:
+            leases.release([post["id"]], owner)
+        return done
+
+    posted = 0
+    with AirtableWriteBuffer() as writer, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pin") as pool:
+        for done in pool.map(publish, posts):
+            if done:
+                update = writer.update("Posts", done["id"], {"Status": "posted"})
+                update.add_done_callback(lambda f, post_id=done["id"]: _posted_marked(leases, owner, post_id, f))
+                posted += 1
+
+    skipped = len(posts) - posted
+    log(f"[Pinterest] Drain finished: {posted} posted, {skipped} skipped/failed in {time.monotonic() - started:.1f}s.")
+    return posted
 
 
 if __name__ == "__main__":
-    run_pinterest_post()
+    parser = argparse.ArgumentParser(description="Publish ready posts to Pinterest.")
+    parser.add_argument("--drain", action="store_true", help="Publish a batch of ready posts instead of one")
+    parser.add_argument("--max-pins", type=int, default=50, help="Most pins to publish in drain mode")
+    parser.add_argument("--deadline", type=float, default=None, help="Seconds after which no new pin is started")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent publishes (default from settings)")
+    args = parser.parse_args()
+
+    if args.drain:
+        drain_pinterest_posts(args.max_pins, args.deadline, args.workers)
+    else:
+        run_pinterest_post()
+    write_prometheus("pinterest")
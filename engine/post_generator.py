@@ -1,38 +1,153 @@
-import os, json, logging
+import json, logging, time
 from datetime import datetime
-from openai import OpenAI
-from .utils import load_json, BASE_DIR
+from .config import get_style
+from .concurrency import backend_slot
+from .metrics import metrics
+from .llm_cache import cache_key, get_cache
+from .openai_client import get_openai_client
 
 log = logging.getLogger("postgen")
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 def _style(key: str | None) -> str:
-    cfg = load_json(BASE_DIR / "config" / "styles.json")
-    return cfg.get(key or "default", {}).get("text_style", "friendly")
+    return get_style(key).text_style
 
-def generate_post(topic: str, style_key: str | None = None) -> dict | None:
-    model = "gpt-4o-mini"
-    prompt = (
+MODEL = "gpt-4o-mini"
+
+
+def build_prompt(topic: str, style: str) -> str:
+    return (
         f"Generate SOCIAL MEDIA content.\n\nTopic: {topic}\n"
-        f"Style: {_style(style_key)}\n\n"
+        f"Style: {style}\n\n"
         "Return JSON with keys title, description (≤3 sentences), "
         "hashtags (array 5-10, no #)."
     )
+
+
+def build_request(topic: str, style_key: str | None = None) -> dict:
+    """Chat-completions request body for one topic (used by the offline Batch API mode)."""
+    return {
+        "model": MODEL,
+        "messages": [{"role": "user", "content": build_prompt(topic, _style(style_key))}],
+        "response_format": {"type": "json_object"},
+    }
+
+
+def parse_post(raw: str | dict) -> dict:
+    """Validate one generated post and normalise hashtags; raises ValueError."""
+    data = json.loads(raw) if isinstance(raw, str) else dict(raw)
+    if not isinstance(data.get("title"), str) or not data["title"].strip():
+        raise ValueError("missing title")
+    if not isinstance(data.get("description"), str):
+        raise ValueError("missing description")
+    hashtags = data.get("hashtags", [])
+    if not isinstance(hashtags, list):
+        raise ValueError("hashtags is not a list")
+    data["hashtags"] = [f"#{str(h).lstrip('#')}" for h in hashtags if h]
+    data["generated_at"] = datetime.utcnow().isoformat()
+    return data
+
+
+def generate_post(topic: str, style_key: str | None = None, use_cache: bool = True) -> dict | None:
+    model = MODEL
+    style = _style(style_key)
+    prompt = build_prompt(topic, style)
+    cache = get_cache()
+    key = cache_key(model, prompt, style)
     try:
-        raw = (
-            client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-            )
-            .choices[0]
-            .message
-            .content
-        )
-        data = json.loads(raw)
-        data["hashtags"] = [f"#{h.lstrip('#')}" for h in data.get("hashtags", [])]
-        data["generated_at"] = datetime.utcnow().isoformat()
+        raw = cache.get(key) if use_cache else None
+        if raw is not None:
+            log.info("LLM cache hit for topic: %s", topic)
+            return parse_post(raw)
+        raw = _complete(model, prompt)
+        data = parse_post(raw)  # only cache responses that validate
+        if use_cache:
+            cache.put(key, raw)
         return data
     except Exception as e:
         log.error("OpenAI error: %s", e)
         return None
+
+
+def generate_posts(topics: list[str], style_key: str | None = None, use_cache: bool = True) -> list[dict | None]:
+    """
+    Generate posts for several topics in one JSON-mode request.
+
+    Returns a list aligned with `topics`; entries the model skipped or got
+    wrong are None so the caller can retry them with `generate_post`.
+    Each valid post is also cached under its single-topic key.
+    """
+    if len(topics) <= 1:
+        return [generate_post(t, style_key, use_cache) for t in topics]
+
+    model = MODEL
+    style = _style(style_key)
+    cache = get_cache()
+    keys = [cache_key(model, build_prompt(t, style), style) for t in topics]
+    results: list[dict | None] = [None] * len(topics)
+
+    missing = []
+    for i, key in enumerate(keys):
+        raw = cache.get(key) if use_cache else None
+        if raw is not None:
+            try:
+                results[i] = parse_post(raw)
+                continue
+            except ValueError:
+                pass
+        missing.append(i)
+    if not missing:
+        return results
+
+    listing = "\n".join(f"{n}. {topics[i]}" for n, i in enumerate(missing))
+    prompt = (
+        f"Generate SOCIAL MEDIA content for each numbered topic below.\n\n"
+        f"Topics:\n{listing}\n\nStyle: {style}\n\n"
+        "Return JSON with key posts: an array with one object per topic, each with "
+        "keys index (the topic number), title, description (≤3 sentences), "
+        "hashtags (array 5-10, no #)."
+    )
+    try:
+        posts = json.loads(_complete(model, prompt)).get("posts", [])
+    except Exception as e:
+        log.error("OpenAI error (multi-topic): %s", e)
+        return results
+
+    for item in posts if isinstance(posts, list) else []:
+        try:
+            n = int(item["index"])
+            if not 0 <= n < len(missing):
+                continue
+            i = missing[n]
+            post = {k: item.get(k) for k in ("title", "description", "hashtags")}
+            results[i] = parse_post(post)
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+            continue
+        if use_cache:
+            cache.put(keys[i], json.dumps(post))
+
+    failed = sum(1 for i in missing if results[i] is None)
+    if failed:
+        log.warning("Multi-topic generation missed %d of %d topic(s)", failed, len(missing))
+    return results
+
+
+def _complete(model: str, prompt: str) -> str:
+    with backend_slot("openai"):
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            content = (
+                get_openai_client().chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    response_format={"type": "json_object"},
+                )
+                .choices[0]
+                .message
+                .content
+            )
+            outcome = "ok"
+            return content
+        finally:
+            metrics.observe("bot_external_seconds", time.perf_counter() - start, service="openai", method="chat")
+            metrics.inc("bot_external_requests_total", service="openai", method="chat", outcome=outcome)
@@ -0,0 +1,266 @@
+"""
+Indexed content queue backed by SQLite (WAL mode).
+
+Every generated post is one row in `posts`, indexed on account, status,
+generated_at and (via `post_platforms`) target platform, so "next ready
+post for account X" is an index lookup rather than a walk of
+generated/. Enqueue, claim and mark-posted each run in a single
+transaction; `claim_next` uses BEGIN IMMEDIATE so two workers can never
+claim the same row.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .config import get_account_settings
+from .utils import GENERATED_DIR, ensure_dir, log
+
+DEFAULT_DB = GENERATED_DIR / "queue.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    account      TEXT NOT NULL,
+    topic        TEXT,
+    title        TEXT,
+    description  TEXT,
+    hashtags     TEXT NOT NULL DEFAULT '[]',
+    status       TEXT NOT NULL DEFAULT 'ready',
+    generated_at TEXT NOT NULL,
+    image_path   TEXT,
+    video_path   TEXT,
+    claimed_by   TEXT,
+    claimed_at   TEXT,
+    posted_at    TEXT,
+    json_path    TEXT UNIQUE,
+    airtable_id  TEXT,
+    extra        TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_posts_account_status ON posts (account, status, generated_at);
+CREATE INDEX IF NOT EXISTS idx_posts_status ON posts (status, generated_at);
+
+CREATE TABLE IF NOT EXISTS post_platforms (
+    post_id   INTEGER NOT NULL REFERENCES posts(id) ON DELETE CASCADE,
+    platform  TEXT NOT NULL,
+    posted_at TEXT,
+    PRIMARY KEY (post_id, platform)
+);
+CREATE INDEX IF NOT EXISTS idx_platforms ON post_platforms (platform, posted_at, post_id);
+"""
+# Columns added after the first release: (name, DDL type)
+MIGRATIONS = (("airtable_id", "TEXT"),)
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class QueueStore:
+    def __init__(self, db_path: Path = DEFAULT_DB):
+        self.db_path = Path(db_path)
+        ensure_dir(self.db_path.parent)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        existing = {r["name"] for r in conn.execute("PRAGMA table_info(posts)")}
+        for name, ddl in MIGRATIONS:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE posts ADD COLUMN {name} {ddl}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_airtable ON posts (airtable_id)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections aren't shareable)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(row: sqlite3.Row | None) -> dict | None:
+        if row is None:
+            return None
+        data = dict(row)
+        data["hashtags"] = json.loads(data["hashtags"])
+        data.update(json.loads(data.pop("extra")))
+        return data
+
+    # ──────────────────────────────────────────────────────────
+    def enqueue(
+        self,
+        account: str,
+        topic: str,
+        post: dict,
+        image_path: Path | str | None = None,
+        video_path: Path | str | None = None,
+        platforms: list[str] | tuple[str, ...] = (),
+        generated_at: str | None = None,
+        status: str = "ready",
+        json_path: Path | str | None = None,
+        extra: dict | None = None,
+    ) -> int | None:
+        """Insert one post; returns its id (None if `json_path` was already imported)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO posts (account, topic, title, description, hashtags, status,"
+                " generated_at, image_path, video_path, json_path, extra)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    account, topic, post.get("title"), post.get("description"),
+                    json.dumps(post.get("hashtags", [])), status,
+                    generated_at or _now(),
+                    str(image_path) if image_path else None,
+                    str(video_path) if video_path else None,
+                    str(json_path) if json_path else None,
+                    json.dumps(extra or {}),
+                ),
+            )
+            post_id = cur.lastrowid if cur.rowcount else None
+            if post_id:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO post_platforms (post_id, platform) VALUES (?, ?)",
+                    [(post_id, p) for p in platforms],
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return post_id
+
+    def set_json_path(self, post_id: int, json_path: Path | str) -> None:
+        self._conn().execute("UPDATE posts SET json_path = ? WHERE id = ?", (str(json_path), post_id))
+
+    def link_airtable(self, json_path: Path | str, airtable_id: str) -> None:
+        """Remember which Airtable Posts record a queued post was saved as."""
+        self._conn().execute("UPDATE posts SET airtable_id = ? WHERE json_path = ?", (airtable_id, str(json_path)))
+
+    def find_by_airtable_id(self, airtable_id: str) -> dict | None:
+        return self._row(self._conn().execute(
+            "SELECT * FROM posts WHERE airtable_id = ? ORDER BY id DESC LIMIT 1", (airtable_id,)
+        ).fetchone())
+
+    def get(self, post_id: int) -> dict | None:
+        return self._row(self._conn().execute("SELECT * FROM posts WHERE id = ?", (post_id,)).fetchone())
+
+    def account_history(self, account: str) -> list[dict]:
+        """id, topic, title and description of every post for `account`, oldest first."""
+        rows = self._conn().execute(
+            "SELECT id, topic, title, description FROM posts WHERE account = ? ORDER BY generated_at, id",
+            (account,),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def claim_next(self, account: str | None = None, platform: str | None = None, worker: str = "") -> dict | None:
+        """
+        Atomically move the oldest 'ready' post (optionally for one account
+        and/or not yet posted to `platform`) to 'claimed' and return it.
+        """
+        where, args = ["p.status = 'ready'"], []
+        if account:
+            where.append("p.account = ?")
+            args.append(account)
+        join = ""
+        if platform:
+            join = "JOIN post_platforms pp ON pp.post_id = p.id AND pp.platform = ? AND pp.posted_at IS NULL"
+            args.insert(0, platform)
+        sql = f"SELECT p.id FROM posts p {join} WHERE {' AND '.join(where)} ORDER BY p.generated_at, p.id LIMIT 1"
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(sql, args).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE posts SET status = 'claimed', claimed_by = ?, claimed_at = ? WHERE id = ?",
+                (worker, _now(), row["id"]),
+            )
+            claimed = conn.execute("SELECT * FROM posts WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self._row(claimed)
+
+    def mark_posted(self, post_id: int, platform: str | None = None) -> None:
+        """Record a successful publish; the post is 'posted' once every platform is done."""
+        conn = self._conn()
+        now = _now()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if platform:
+                conn.execute(
+                    "INSERT INTO post_platforms (post_id, platform, posted_at) VALUES (?, ?, ?)"
+                    " ON CONFLICT (post_id, platform) DO UPDATE SET posted_at = excluded.posted_at",
+                    (post_id, platform, now),
+                )
+            remaining = conn.execute(
+                "SELECT COUNT(*) FROM post_platforms WHERE post_id = ? AND posted_at IS NULL", (post_id,)
+            ).fetchone()[0]
+            status = "posted" if remaining == 0 else "ready"
+            conn.execute(
+                "UPDATE posts SET status = ?, posted_at = ?, claimed_by = NULL, claimed_at = NULL WHERE id = ?",
+                (status, now, post_id),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release(self, post_id: int, status: str = "ready") -> None:
+        """Give a claimed post back (or park it, e.g. status='failed')."""
+        self._conn().execute(
+            "UPDATE posts SET status = ?, claimed_by = NULL, claimed_at = NULL WHERE id = ?",
+            (status, post_id),
+        )
+
+    def counts(self) -> dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM posts GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    # ──────────────────────────────────────────────────────────
+    def import_json_tree(self, generated_dir: Path = GENERATED_DIR) -> int:
+        """Import legacy generated/<account>/<date>/*.json files; safe to re-run."""
+        imported = 0
+        for f in sorted(generated_dir.glob("*/*/*.json")):
+            try:
+                with open(f, "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError) as e:
+                log(f"[QUEUE] Skipping unreadable {f}: {e}")
+                continue
+            if not isinstance(data, dict) or "account" not in data:
+                continue
+            if data.get("queue_id"):
+                continue  # written by save_post_to_queue, already in the store
+            post_id = self.enqueue(
+                data["account"], data.get("topic"), data,
+                image_path=data.get("image_path"), video_path=data.get("video_path"),
+                generated_at=data.get("generated_at"), status=data.get("status") or "ready",
+                platforms=get_account_settings(data["account"]).platforms, json_path=f,
+            )
+            imported += 1 if post_id else 0
+        log(f"[QUEUE] Imported {imported} legacy post(s) from {generated_dir}")
+        return imported
+
+
+_store: QueueStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_queue_store() -> QueueStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = QueueStore()
+        return _store
@@ -0,0 +1,157 @@
+"""
+Render-asset cache for video generation.
+
+Two kinds of prepared rasters are cached, in memory (per process) and on
+disk under cache/render/ (shared by all render workers):
+
+  * title overlays, keyed on (text, font, size, colours, stroke, width)
+  * 9:16 backgrounds, keyed on the source image's content hash + size
+
+Both tiers are LRU-bounded; disk recency is the file mtime, so it
+survives restarts.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PIL import Image
+
+from .utils import CACHE_DIR, ensure_dir
+from .video_frames import FRAME_SIZE, prepare_background, render_title_overlay
+
+DEFAULT_DIR = CACHE_DIR / "render"
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class RenderAssetCache:
+    def __init__(self, cache_dir: Path = DEFAULT_DIR, memory_items: int = 4, disk_max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.memory_items = memory_items
+        self.disk_max_bytes = disk_max_bytes
+        self.hits = {"memory": 0, "disk": 0, "miss": 0}
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, Image.Image] = OrderedDict()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.png"
+
+    def _remember(self, key: str, img: Image.Image) -> None:
+        with self._lock:
+            self._memory[key] = img
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _get(self, key: str, build) -> tuple[Image.Image, Path]:
+        path = self._path(key)
+        with self._lock:
+            img = self._memory.get(key)
+            if img is not None:
+                self._memory.move_to_end(key)
+                self.hits["memory"] += 1
+        if img is not None and path.exists():
+            os.utime(path)
+            return img, path
+
+        if path.exists():
+            with Image.open(path) as f:
+                img = f.copy()
+            os.utime(path)
+            self.hits["disk"] += 1
+        else:
+            img = build()
+            self._store(path, img)
+            self.hits["miss"] += 1
+        self._remember(key, img)
+        return img, path
+
+    def _store(self, path: Path, img: Image.Image) -> None:
+        ensure_dir(path.parent)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        img.save(tmp, format="PNG", compress_level=1)
+        os.replace(tmp, path)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        files = []
+        total = 0
+        for f in self.cache_dir.glob("*/*.png"):
+            try:
+                st = f.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, f))
+            total += st.st_size
+        files.sort()
+        for _, size, f in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                f.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    # ──────────────────────────────────────────────────────────
+    @staticmethod
+    def _background_key(digest: str, size: tuple[int, int]) -> str:
+        return hashlib.sha256(f"bg|{digest}|{tuple(size)}".encode()).hexdigest()
+
+    def background(self, image_path: Path, size: tuple[int, int] = FRAME_SIZE) -> tuple[Image.Image, Path]:
+        """Cropped/resized RGB background for `image_path` and its cached PNG path."""
+        key = self._background_key(file_digest(image_path), size)
+        return self._get(key, lambda: prepare_background(image_path, size))
+
+    def put_background(self, digest: str, img: Image.Image, size: tuple[int, int] = FRAME_SIZE) -> Path:
+        """
+        Store a background prepared elsewhere for the source with sha256
+        `digest`. Disk only: renders read it back in their own processes.
+        """
+        path = self._path(self._background_key(digest, size))
+        if path.exists():
+            os.utime(path)
+        else:
+            self._store(path, img)
+        return path
+
+    def overlay(
+        self,
+        text: str,
+        width: int = FRAME_SIZE[0],
+        fontsize: int = 70,
+        color: str = "white",
+        stroke_color: str = "black",
+        stroke_width: int = 3,
+        font_path: str | None = None,
+    ) -> tuple[Image.Image, Path]:
+        """Transparent title raster (see `render_title_overlay`) and its cached PNG path."""
+        raw = f"txt|{text}|{font_path}|{fontsize}|{color}|{stroke_color}|{stroke_width}|{width}"
+        key = hashlib.sha256(raw.encode()).hexdigest()
+        return self._get(key, lambda: render_title_overlay(
+            text, width=width, fontsize=fontsize, color=color,
+            stroke_color=stroke_color, stroke_width=stroke_width, font_path=font_path,
+        ))
+
+
+_cache: RenderAssetCache | None = None
+
+
+def get_render_cache() -> RenderAssetCache:
+    global _cache
+    if _cache is None:
+        from .video_generator import video_settings
+
+        # Keys are per post (its image, its title), so memory hits are rare
+        # and every render worker holds its own copy: keep the tier small.
+        _cache = RenderAssetCache(memory_items=int(video_settings()["cache_memory_items"]))
+    return _cache
@@ -0,0 +1,137 @@
+"""
+Process-pool render queue for CPU-bound video jobs.
+
+`create_video_for_post` jobs are submitted as futures to a pool sized to
+the available cores, so a run renders many videos in parallel instead of
+one after another. Each job runs under a per-job timeout inside the
+worker; when it fires, the worker kills any ffmpeg children it spawned
+and the job resolves to None. A job that overruns even that (a worker
+stuck where the alarm can't interrupt it) gets the pool recycled: its
+processes are killed and a fresh pool takes new jobs.
+"""
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+
+from .metrics import metrics
+from .utils import log
+
+
+class RenderTimeout(BaseException):
+    """Raised by SIGALRM; a BaseException so renderer fallbacks can't swallow it."""
+
+
+def _on_alarm(signum, frame):
+    raise RenderTimeout()
+
+
+def _kill_children() -> None:
+    """Best-effort SIGKILL of this worker's child processes (Linux /proc)."""
+    me = os.getpid()
+    for entry in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = entry.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == me:
+            try:
+                os.kill(int(entry.parent.name), signal.SIGKILL)
+            except OSError:
+                pass
+
+
+def _render_video(account_name: str, topic: str, post: dict, image_path: str, style_key: str | None, timeout: float) -> tuple[str | None, float]:
+    """
+    Pool worker: render one video, enforcing `timeout` with SIGALRM.
+    Returns (video path or None, render seconds) so the parent can record
+    the timing; metrics in the worker process would be lost.
+    """
+    from .video_generator import create_video_for_post
+
+    start = time.perf_counter()
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.alarm(max(1, int(timeout)))
+    try:
+        path = create_video_for_post(account_name, topic, post, Path(image_path), style_key)
+        return (str(path) if path else None), time.perf_counter() - start
+    except RenderTimeout:
+        _kill_children()
+        log(f"[{account_name}] Video render timed out after {timeout:.0f}s: {topic}")
+        return None, time.perf_counter() - start
+    finally:
+        signal.alarm(0)
+
+
+class RenderQueue:
+    def __init__(self, max_workers: int | None = None, timeout: float = 180.0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+        self._jobs: list[Future] = []
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: workers must not inherit the parent's threads and locks
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _recycle(self, pool: ProcessPoolExecutor) -> None:
+        """Kill the workers of `pool` (if still current) and start a fresh pool."""
+        with self._lock:
+            if pool is not self._pool:
+                return  # already recycled by another waiter
+            self._pool = self._new_pool()
+        # Jobs still on the old pool fail with BrokenProcessPool (→ None).
+        for proc in list(getattr(pool, "_processes", {}).values()):
+            proc.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, account_name: str, topic: str, post: dict, image_path: Path, style_key: str | None = None) -> Future:
+        """Queue a video render; the Future resolves to the video path or None."""
+        with self._lock:
+            pool = self._pool
+            future = pool.submit(
+                _render_video, account_name, topic, post, str(image_path), style_key, self.timeout,
+            )
+        future.render_pool = pool
+        self._jobs.append(future)
+        return future
+
+    def result(self, future: Future) -> Path | None:
+        """Wait for one job (bounded by the job timeout plus a grace period)."""
+        try:
+            path, seconds = future.result(timeout=self.timeout + 30)
+        except FutureTimeout:
+            metrics.inc("bot_stage_errors_total", stage="video_render")
+            if future.cancel():
+                log("[RENDER] Job never started in time; cancelled it.")
+            else:
+                log("[RENDER] Job overran its timeout; recycling the render workers.")
+                self._recycle(future.render_pool)
+            return None
+        except Exception as e:
+            metrics.inc("bot_stage_errors_total", stage="video_render")
+            log(f"[RENDER] Job failed: {e}")
+            return None
+        metrics.observe("bot_stage_seconds", seconds, stage="video_render")
+        if not path:
+            metrics.inc("bot_stage_errors_total", stage="video_render")
+        return Path(path) if path else None
+
+    def cancel_pending(self) -> int:
+        """Cancel jobs that haven't started yet; returns how many were cancelled."""
+        return sum(1 for f in self._jobs if f.cancel())
+
+    def shutdown(self, cancel: bool = False) -> None:
+        if cancel:
+            self.cancel_pending()
+        with self._lock:
+            pool = self._pool
+        pool.shutdown(wait=not cancel, cancel_futures=cancel)
@@ -0,0 +1,165 @@
+"""
+Write-ahead journal of per-topic pipeline state (SQLite, WAL mode).
+
+Each claimed topic moves through
+
+    claimed → generated → post_created → topic_marked
+
+and every step is committed before the next one starts. The generated
+post is stored with the entry, so a crash or Airtable error after the LLM
+call never costs a second generation: `AccountManager.resume_journal()`
+picks up unfinished entries at startup and finishes them instead.
+
+Entries record the worker that claimed them. A worker resumes its own
+entries, and other workers' entries only once nobody has touched them for
+a lease period — until then they may still be in flight elsewhere.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .utils import GENERATED_DIR, ensure_dir, log
+
+DEFAULT_DB = GENERATED_DIR / "journal.db"
+
+STATES = ("claimed", "generated", "post_created", "topic_marked")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    topic_id    TEXT PRIMARY KEY,
+    account     TEXT NOT NULL,
+    topic       TEXT NOT NULL,
+    state       TEXT NOT NULL,
+    post        TEXT,
+    record_id   TEXT,
+    queue_path  TEXT,
+    owner       TEXT,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_journal_state ON journal (state, updated_at);
+"""
+MIGRATIONS = [("owner", "TEXT")]
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class RunJournal:
+    def __init__(self, db_path: Path = DEFAULT_DB):
+        self.db_path = Path(db_path)
+        ensure_dir(self.db_path.parent)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        existing = {r["name"] for r in conn.execute("PRAGMA table_info(journal)")}
+        for name, ddl in MIGRATIONS:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE journal ADD COLUMN {name} {ddl}")
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (sqlite3 connections aren't shareable)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(row: sqlite3.Row | None) -> dict | None:
+        if row is None:
+            return None
+        entry = dict(row)
+        entry["post"] = json.loads(entry["post"]) if entry["post"] else None
+        return entry
+
+    # ──────────────────────────────────────────────────────────
+    def claim(self, account: str, topic_id: str, topic: str, owner: str | None = None) -> dict:
+        """Record a claim by `owner` and return the entry (an existing one keeps its progress)."""
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO journal (topic_id, account, topic, state, owner, updated_at) "
+            "VALUES (?, ?, ?, 'claimed', ?, ?) "
+            "ON CONFLICT(topic_id) DO UPDATE SET attempts = attempts + 1, owner = excluded.owner, "
+            "updated_at = excluded.updated_at",
+            (topic_id, account, topic, owner, _now()),
+        )
+        return self.get(topic_id)
+
+    def generated(self, topic_id: str, post: dict) -> None:
+        self._advance(topic_id, "generated", post=json.dumps(post))
+
+    def post_created(self, topic_id: str, record_id: str) -> None:
+        self._advance(topic_id, "post_created", record_id=record_id)
+
+    def topic_marked(self, topic_id: str) -> None:
+        self._advance(topic_id, "topic_marked")
+
+    def set_queue_path(self, topic_id: str, queue_path: str | Path) -> None:
+        self._conn().execute(
+            "UPDATE journal SET queue_path = ?, updated_at = ? WHERE topic_id = ?",
+            (str(queue_path), _now(), topic_id),
+        )
+
+    def _advance(self, topic_id: str, state: str, **fields) -> None:
+        # Never move an entry backwards (callbacks can land out of order).
+        allowed = STATES[:STATES.index(state)]
+        sets = "".join(f", {k} = ?" for k in fields)
+        self._conn().execute(
+            f"UPDATE journal SET state = ?, updated_at = ?{sets} "
+            f"WHERE topic_id = ? AND state IN ({', '.join('?' * len(allowed))})",
+            (state, _now(), *fields.values(), topic_id, *allowed),
+        )
+
+    # ──────────────────────────────────────────────────────────
+    def get(self, topic_id: str) -> dict | None:
+        return self._row(self._conn().execute("SELECT * FROM journal WHERE topic_id = ?", (topic_id,)).fetchone())
+
+    def resumable(self, owner: str, stale_seconds: float) -> list[dict]:
+        """Unfinished entries that are `owner`'s, or that nobody has touched for `stale_seconds`."""
+        cutoff = (datetime.now() - timedelta(seconds=stale_seconds)).isoformat(timespec="seconds")
+        rows = self._conn().execute(
+            "SELECT * FROM journal WHERE state != 'topic_marked' AND (owner = ? OR updated_at < ?) "
+            "ORDER BY updated_at",
+            (owner, cutoff),
+        ).fetchall()
+        return [self._row(r) for r in rows]
+
+    def in_flight_ids(self) -> set[str]:
+        """Topics with a generated post that isn't finished yet (resume handles these)."""
+        rows = self._conn().execute(
+            "SELECT topic_id FROM journal WHERE state IN ('generated', 'post_created')"
+        ).fetchall()
+        return {r["topic_id"] for r in rows}
+
+    def forget(self, topic_id: str) -> None:
+        self._conn().execute("DELETE FROM journal WHERE topic_id = ?", (topic_id,))
+
+    def prune(self, days: int = 7) -> int:
+        """Drop finished entries older than `days`; returns how many."""
+        cutoff = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds")
+        cur = self._conn().execute(
+            "DELETE FROM journal WHERE state = 'topic_marked' AND updated_at < ?", (cutoff,),
+        )
+        if cur.rowcount:
+            log(f"[JOURNAL] Pruned {cur.rowcount} finished entr(y/ies).")
+        return cur.rowcount
+
+
+_journal: RunJournal | None = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> RunJournal:
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = RunJournal()
+        return _journal
@@ -4,28 +4,81 @@ Designed to be triggered via cron or Coolify Scheduled Task.
 """
 
 import logging
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from engine import concurrency
 from engine.account_manager import AccountManager
-
-# Load environment variables
-load_dotenv()
+from engine.airtable_client import get_client
+from engine.llm_cache import get_cache
+from engine.metrics import span
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 log = logging.getLogger("scheduler")
 
 
-def run_once():
-    """Run a single scheduling pass."""
+def _process_account(account_manager: AccountManager, acc_path: Path, count: int | None = None) -> list[dict]:
+    """Run one account's pipeline; failures never leak into other accounts."""
+    account_name = acc_path.name
+    log.info(f"Processing account: {account_name}")
+    try:
+        with span("account"):
+            return account_manager.generate_for_account(acc_path, count)
+    except Exception as e:
+        log.exception(f"[{account_name}] Account failed: {e}")
+        return []
+
+
+def run_once(max_workers: int | None = None, account_manager: AccountManager | None = None) -> list[dict]:
+    """
+    Run a single scheduling pass.
+
+    Accounts are processed in parallel on a bounded thread pool; OpenAI and
+    Airtable calls are further capped by the per-backend limits in
+    `engine.concurrency`. Pass `max_workers=1` for the old sequential run.
+    Topics for every account are prefetched in one Airtable scan first,
+    after unfinished topics from the run journal have been resumed.
+    Returns one summary dict per saved post, in account order.
+
+    A caller-supplied `account_manager` is reused and left open (its write
+    buffer is still flushed); otherwise one is built and closed per run.
+    """
     log.info("Starting scheduled bot run...")
+    results: list[dict] = []
     try:
-        account_manager = AccountManager()
+        limits = concurrency.configure()
+        owns_manager = account_manager is None
+        if owns_manager:
+            account_manager = AccountManager()
         accounts = account_manager.get_all_accounts()
+        results.extend(account_manager.resume_journal())
+        account_manager.prefetch_topics(accounts)
+
+        workers = max(1, min(max_workers or limits["accounts"], len(accounts) or 1))
+        log.info(f"Processing {len(accounts)} account(s) with {workers} worker(s)")
 
-        for acc_path in accounts:
-            account_name = acc_path.name
-            log.info(f"Processing account: {account_name}")
-            account_manager.generate_for_account(acc_path)
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="account") as pool:
+                futures = [pool.submit(_process_account, account_manager, p) for p in accounts]
+                for future in futures:
+                    results.extend(future.result())
+            with span("render_wait"):
+                account_manager.complete_renders(results)
+        finally:
+            # Push any buffered Airtable writes, even if the run blew up.
+            if owns_manager:
+                account_manager.close()
+            else:
+                account_manager.writer.flush()
 
+        account_manager.link_records(results)
+
+        for method, s in get_client().stats().items():
+            log.info(
+                f"Airtable {method}: {s['calls']} call(s), {s['retries']} retr(y/ies), "
+                f"{s['errors']} error(s), avg {s['avg_ms']:.0f} ms, max {s['max_ms']:.0f} ms"
+            )
+        cache = get_cache().stats()
+        log.info(f"LLM cache: {cache['hits']} hit(s), {cache['misses']} miss(es), {cache['entries']} entries")
         log.info("Bot run completed successfully ✅")
 
     except Exception as e:
@@ -33,6 +86,8 @@ def run_once():
     finally:
         log.info("Scheduler finished.")
 
+    return results
+
 
 if __name__ == "__main__":
     run_once()
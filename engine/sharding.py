@@ -0,0 +1,79 @@
+"""
+Account sharding across engine replicas.
+
+Each replica knows its index and the replica count (`sharding` block in
+master_settings.json, overridden per container by BOT_SHARD_INDEX /
+BOT_SHARD_COUNT). Accounts map to replicas on a consistent-hash ring, so
+adding a replica only moves about 1/N of the accounts. Topic claims are
+additionally protected by leases (see `engine.leases`), which covers the
+hand-over while replicas are being added or removed.
+"""
+
+import bisect
+import hashlib
+import os
+import socket
+from dataclasses import dataclass
+
+from .config import get_master_settings
+
+DEFAULT_SHARDING_SETTINGS = {
+    "count": 1,
+    "index": 0,
+    "vnodes": 64,            # ring points per replica
+    "lease_seconds": 1800,   # topic lease before another replica may reclaim it
+    "lease_store": "sqlite",
+}
+
+
+def sharding_settings() -> dict:
+    settings = {**DEFAULT_SHARDING_SETTINGS, **get_master_settings().section("sharding")}
+    if os.getenv("BOT_SHARD_COUNT"):
+        settings["count"] = int(os.environ["BOT_SHARD_COUNT"])
+    if os.getenv("BOT_SHARD_INDEX"):
+        settings["index"] = int(os.environ["BOT_SHARD_INDEX"])
+    return settings
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, count: int, vnodes: int = 64):
+        self.count = max(1, count)
+        points = sorted((_hash(f"replica-{r}#{v}"), r) for r in range(self.count) for v in range(vnodes))
+        self._keys = [h for h, _ in points]
+        self._owners = [r for _, r in points]
+
+    def owner(self, name: str) -> int:
+        """Replica index responsible for `name`."""
+        if self.count == 1:
+            return 0
+        i = bisect.bisect(self._keys, _hash(name)) % len(self._keys)
+        return self._owners[i]
+
+
+@dataclass(frozen=True)
+class Shard:
+    index: int
+    count: int
+    worker_id: str
+    ring: HashRing
+
+    def owns(self, account_name: str) -> bool:
+        return self.ring.owner(account_name) == self.index
+
+
+def worker_id() -> str:
+    """This process's id for leases and the run journal (BOT_WORKER_ID, else host:pid)."""
+    return os.getenv("BOT_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+def current_shard() -> Shard:
+    settings = sharding_settings()
+    count = max(1, int(settings["count"]))
+    index = int(settings["index"])
+    if not 0 <= index < count:
+        raise ValueError(f"shard index {index} out of range for {count} replica(s)")
+    return Shard(index, count, worker_id(), HashRing(count, int(settings["vnodes"])))
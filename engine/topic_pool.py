@@ -0,0 +1,113 @@
+"""
+In-memory pool of 'To Use' topics, prefetched once per run.
+
+One projected, paginated scan of the Topics table replaces a filtered
+query per account; topics are partitioned by account and handed out with
+`claim()` so each account can take as many as its `daily_posts` allow.
+A pool can be re-prefetched (the daemon does so as accounts run low);
+topics it already handed out are not handed out again. With a lease
+store, a topic is only handed out once its lease is ours, so replicas
+never work on the same topic.
+"""
+
+import random
+import threading
+
+from .airtable_client import airtable_iter
+from .airtable_mirror import get_mirror
+from .leases import LeaseStore
+from .utils import log
+
+
+class TopicPool:
+    def __init__(
+        self,
+        account_name_to_id: dict[str, str],
+        leases: LeaseStore | None = None,
+        owner: str = "",
+        lease_ttl: float = 1800.0,
+    ):
+        self.account_name_to_id = account_name_to_id
+        self.leases = leases
+        self.owner = owner
+        self.lease_ttl = lease_ttl
+        self._id_to_name = {rid: name for name, rid in account_name_to_id.items()}
+        self._topics: dict[str, list[tuple[str, str]]] = {}
+        self._claimed: set[str] = set()  # handed out, maybe not yet marked Used
+        self._lock = threading.Lock()
+
+    def _account_names(self, value) -> list[str]:
+        # Linked-record fields come back as a list of record IDs; plain text
+        # (or lookup) fields come back as the account name itself.
+        values = value if isinstance(value, list) else [value]
+        return [self._id_to_name.get(v, v) for v in values if v]
+
+    def prefetch(self, account_names: list[str]) -> int:
+        """Load every 'To Use' topic for `account_names` in one scan. Returns the count."""
+        wanted = set(account_names)
+        if not wanted:
+            return 0
+        accounts = ", ".join(f"Account='{name}'" for name in sorted(wanted))
+        formula = f"AND(Status='To Use', OR({accounts}))"
+        # The name → ID mapping may have been reloaded since the last scan.
+        self._id_to_name = {rid: name for name, rid in self.account_name_to_id.items()}
+
+        topics: dict[str, list[tuple[str, str]]] = {name: [] for name in wanted}
+        total = 0
+        seen = set()
+        mirror = get_mirror()
+        # A stale mirror could offer topics that were already marked Used.
+        recs = mirror.fresh_records("Topics", Status="To Use") if mirror else None
+        if recs is None:
+            recs = airtable_iter("Topics", fields=["Topic", "Account"], formula=formula)
+        for rec in recs:
+            seen.add(rec["id"])
+            text = rec["fields"].get("Topic")
+            if not text or rec["id"] in self._claimed:
+                continue
+            for name in self._account_names(rec["fields"].get("Account")):
+                if name in wanted:
+                    topics[name].append((rec["id"], text))
+                    total += 1
+
+        with self._lock:
+            self._topics = topics
+            # Claimed topics missing from the scan are marked Used; forget them.
+            self._claimed &= seen
+        log(f"[TOPICS] Prefetched {total} topic(s) for {len(wanted)} account(s).")
+        return total
+
+    def claim(self, account_name: str, n: int = 1) -> list[tuple[str, str]]:
+        """
+        Remove and return up to `n` random `(topic_id, topic_text)` pairs.
+        Topics leased by another replica are skipped (and dropped).
+        """
+        picked: list[tuple[str, str]] = []
+        while len(picked) < n:
+            with self._lock:
+                available = self._topics.get(account_name, [])
+                batch = []
+                for _ in range(min(n - len(picked), len(available))):
+                    i = random.randrange(len(available))
+                    # swap-remove keeps claims O(1)
+                    available[i], available[-1] = available[-1], available[i]
+                    batch.append(available.pop())
+            if not batch:
+                break
+            if self.leases is not None:
+                leased = set(self.leases.acquire([t for t, _ in batch], self.owner, self.lease_ttl))
+                batch = [t for t in batch if t[0] in leased]
+            with self._lock:
+                self._claimed.update(topic_id for topic_id, _ in batch)
+            picked.extend(batch)
+        return picked
+
+    def discard(self, topic_ids: set[str]) -> None:
+        """Drop topics that are already spoken for (e.g. in a pending batch job)."""
+        with self._lock:
+            for name, topics in self._topics.items():
+                self._topics[name] = [t for t in topics if t[0] not in topic_ids]
+
+    def remaining(self, account_name: str) -> int:
+        with self._lock:
+            return len(self._topics.get(account_name, []))
@@ -1,10 +1,22 @@
 import json
+import os
 from pathlib import Path
 from datetime import datetime
+from dotenv import load_dotenv
+
+# Loaded once here, before any engine module reads settings from the environment.
+load_dotenv()
 
 # Base directory of the repo
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Runtime data and account folders can be moved out of the repo
+# (e.g. for benchmarks against the local fake servers).
+DATA_DIR = Path(os.getenv("BOT_DATA_DIR") or BASE_DIR)
+ACCOUNTS_DIR = Path(os.getenv("BOT_ACCOUNTS_DIR") or BASE_DIR / "accounts")
+GENERATED_DIR = DATA_DIR / "generated"
+CACHE_DIR = DATA_DIR / "cache"
+
 
 def load_json(path):
     with open(path, "r", encoding="utf-8") as f:
@@ -25,5 +37,17 @@ def ensure_dir(path: Path):
     path.mkdir(parents=True, exist_ok=True)
 
 
+def reserve_path(out_dir: Path, stem: str, tail: str) -> Path:
+    """Create an empty `<stem><tail>`, or `<stem>_2<tail>`, ... if that name is taken."""
+    n = 1
+    while True:
+        path = out_dir / (f"{stem}{tail}" if n == 1 else f"{stem}_{n}{tail}")
+        try:
+            open(path, "x").close()
+            return path
+        except FileExistsError:
+            n += 1
+
+
 def log(message: str):
     print(f"[{datetime.now().isoformat(timespec='seconds')}] {message}")
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Still-frame preparation for the video renderers (Pillow).
+
+Builds the 1080×1920 frame the ffmpeg path encodes: the source image
+resized/cropped to 9:16 with the post title burned in near the bottom,
+matching the layout of the moviepy TextClip overlay.
+"""
+
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+FRAME_SIZE = (1080, 1920)
+FONT_CANDIDATES = (
+    "Arial Bold.ttf",
+    "Arial-Bold.ttf",
+    "arialbd.ttf",
+    "DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+)
+
+
+def load_font(size: int, font_path: str | None = None) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    for candidate in ((font_path,) if font_path else ()) + FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def prepare_background(image_path: Path, size: tuple[int, int] = FRAME_SIZE) -> Image.Image:
+    """Resize to cover `size` and centre-crop, like the moviepy resize+crop."""
+    with Image.open(image_path) as src:
+        return cover_crop(src.convert("RGB"), size)
+
+
+def cover_crop(img: Image.Image, size: tuple[int, int] = FRAME_SIZE) -> Image.Image:
+    """`prepare_background` for an already decoded RGB image."""
+    width, height = size
+    scale = max(width / img.width, height / img.height)
+    img = img.resize((round(img.width * scale), round(img.height * scale)), Image.LANCZOS)
+    left = (img.width - width) // 2
+    top = (img.height - height) // 2
+    return img.crop((left, top, left + width, top + height))
+
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font, max_width: int) -> list[str]:
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if line and draw.textlength(candidate, font=font) > max_width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    return lines + ([line] if line else [])
+
+
+def render_title_overlay(
+    text: str,
+    width: int = FRAME_SIZE[0],
+    fontsize: int = 70,
+    color: str = "white",
+    stroke_color: str = "black",
+    stroke_width: int = 3,
+    font_path: str | None = None,
+) -> Image.Image:
+    """Transparent RGBA strip holding the wrapped, stroked title text."""
+    font = load_font(fontsize, font_path)
+    probe = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    lines = _wrap(probe, text, font, width - 2 * (40 + stroke_width))
+    line_height = fontsize + 2 * stroke_width + 10
+    overlay = Image.new("RGBA", (width, max(1, line_height * len(lines))), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    for i, line in enumerate(lines):
+        draw.text(
+            (width / 2, i * line_height),
+            line,
+            font=font,
+            fill=color,
+            stroke_width=stroke_width,
+            stroke_fill=stroke_color,
+            anchor="ma",
+        )
+    return overlay
+
+
+def compose_frame(background: Image.Image, overlay: Image.Image, bottom_margin: int = 120) -> Image.Image:
+    frame = background.copy()
+    top = frame.height - bottom_margin - overlay.height
+    frame.paste(overlay, ((frame.width - overlay.width) // 2, top), overlay)
+    return frame
@@ -1,57 +1,149 @@
-from moviepy.editor import ImageClip, TextClip, CompositeVideoClip
+import os
+import shutil
+import subprocess
+import tempfile
 from pathlib import Path
 from datetime import datetime
 
-from .utils import BASE_DIR, ensure_dir, log, load_json
+from .utils import GENERATED_DIR, ensure_dir, log, reserve_path
+from .config import get_master_settings, get_style
 
+FINAL_SIZE = (1080, 1920)
+DEFAULT_VIDEO_SETTINGS = {
+    "renderer": "ffmpeg",   # "ffmpeg" (still-image fast path) or "moviepy"
+    "fps": 30,
+    "duration": 7,          # seconds
+    "crf": 23,
+    "preset": "veryfast",
+    "font_path": None,
+    "timeout": 120,         # seconds before a stuck ffmpeg encode is killed
+    "cache_memory_items": 4,  # rasters each render process keeps in memory (0: disk only)
+}
 
-def create_video_for_post(account_name: str, topic: str, post: dict, image_path: Path | None, style_key: str | None = None) -> Path | None:
+
+def video_settings() -> dict:
+    """`video` block of master_settings.json over DEFAULT_VIDEO_SETTINGS."""
+    return {**DEFAULT_VIDEO_SETTINGS, **get_master_settings().section("video")}
+
+
+def ffmpeg_exe() -> str | None:
+    """System ffmpeg, else the binary bundled with imageio-ffmpeg (a moviepy dependency)."""
+    exe = os.getenv("FFMPEG_BINARY") or shutil.which("ffmpeg")
+    if exe:
+        return exe
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return None
+
+
+def render_ffmpeg(image_path: Path, title_text: str, output_path: Path, settings: dict) -> Path:
+    """
+    Fast path: bake the title into one 1080×1920 frame with Pillow and let
+    ffmpeg loop that still (libx264, -tune stillimage) for the duration.
+    """
+    from .render_cache import get_render_cache
+    from .video_frames import compose_frame
+
+    exe = ffmpeg_exe()
+    if not exe:
+        raise RuntimeError("ffmpeg binary not found")
+
+    cache = get_render_cache()
+    background, _ = cache.background(image_path, FINAL_SIZE)
+    overlay, _ = cache.overlay(title_text, width=FINAL_SIZE[0], font_path=settings["font_path"])
+    frame = compose_frame(background, overlay)
+    with tempfile.TemporaryDirectory() as tmp:
+        frame_path = Path(tmp) / "frame.png"
+        frame.save(frame_path, compress_level=1)
+        cmd = [
+            exe, "-y", "-hide_banner", "-loglevel", "error",
+            "-loop", "1", "-framerate", str(settings["fps"]), "-i", str(frame_path),
+            "-t", str(settings["duration"]),
+            "-c:v", "libx264", "-tune", "stillimage",
+            "-preset", str(settings["preset"]), "-crf", str(settings["crf"]),
+            "-pix_fmt", "yuv420p", "-r", str(settings["fps"]),
+            "-movflags", "+faststart",
+            str(output_path),
+        ]
+        # On timeout subprocess.run kills the ffmpeg child before raising.
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=settings["timeout"])
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {proc.returncode}: {proc.stderr.strip()[-500:]}")
+    return output_path
+
+
+def render_moviepy(image_path: Path, title_text: str, output_path: Path, settings: dict) -> Path:
+    """
+    Fallback renderer: composite clips with moviepy and re-encode every frame.
+    The 9:16 background and title raster come from the render-asset cache,
+    so no per-call resize/crop or ImageMagick text rendering is needed.
+    """
+    from moviepy.editor import ImageClip, CompositeVideoClip
+    from .render_cache import get_render_cache
+
+    duration = settings["duration"]
+    cache = get_render_cache()
+    _, background_png = cache.background(image_path, FINAL_SIZE)
+    _, overlay_png = cache.overlay(title_text, width=FINAL_SIZE[0], font_path=settings["font_path"])
+
+    background = ImageClip(str(background_png)).set_duration(duration)
+    txt_clip = (
+        ImageClip(str(overlay_png), transparent=True)
+        .set_duration(duration)
+        .set_position(("center", "bottom"))
+        .margin(bottom=120, opacity=0)
+    )
+
+    final = CompositeVideoClip([background, txt_clip], size=FINAL_SIZE)
+    final.write_videofile(str(output_path), fps=settings["fps"], codec="libx264", audio=False)
+    return output_path
+
+
+RENDERERS = {"ffmpeg": render_ffmpeg, "moviepy": render_moviepy}
+
+
+def create_video_for_post(account_name: str, topic: str, post: dict, image_path: Path | None, style_key: str | None = None, renderer: str | None = None) -> Path | None:
     if not image_path or not Path(image_path).exists():
         log(f"[{account_name}] No image found for video generation.")
         return None
 
+    output_path = None
     try:
-        styles = load_json(BASE_DIR / "config" / "styles.json")
-        style_cfg = styles.get(style_key or "default", styles.get("default"))
-        # video_style = style_cfg.get("video_style")  # not heavily used yet
+        style_cfg = get_style(style_key)
+        # video_style = style_cfg.video_style  # not heavily used yet
+        settings = video_settings()
+        renderer = renderer or settings["renderer"]
 
         now = datetime.now()
         date_str = now.strftime("%Y-%m-%d")
         time_str = now.strftime("%H%M%S")
 
-        output_dir = BASE_DIR / "generated" / account_name / date_str
+        output_dir = GENERATED_DIR / account_name / date_str
         ensure_dir(output_dir)
-        output_path = output_dir / f"{time_str}_video.mp4"
+        # Renders for one account run in parallel; don't share a file name.
+        output_path = reserve_path(output_dir, time_str, "_video.mp4")
 
         log(f"[{account_name}] Creating video for: {topic}")
-
-        final_size = (1080, 1920)
-        duration = 7  # seconds
-
-        background = ImageClip(str(image_path)).set_duration(duration)
-        # Resize/crop to 9:16
-        background = background.resize(height=1920)
-        if background.w < 1080:
-            background = background.resize(width=1080)
-        background = background.crop(width=1080, height=1920, x_center=background.w / 2, y_center=background.h / 2)
-
         title_text = post.get("title", topic)
 
-        txt_clip = TextClip(
-            title_text,
-            fontsize=70,
-            color="white",
-            stroke_color="black",
-            stroke_width=3,
-            font="Arial-Bold"
-        ).set_duration(duration).set_position(("center", "bottom")).margin(bottom=120)
-
-        final = CompositeVideoClip([background, txt_clip], size=final_size)
-        final.write_videofile(str(output_path), fps=30, codec="libx264", audio=False)
+        if renderer == "ffmpeg":
+            try:
+                render_ffmpeg(Path(image_path), title_text, output_path, settings)
+            except Exception as e:
+                log(f"[{account_name}] ffmpeg renderer failed ({e}); falling back to moviepy.")
+                render_moviepy(Path(image_path), title_text, output_path, settings)
+        else:
+            RENDERERS[renderer](Path(image_path), title_text, output_path, settings)
 
         log(f"[{account_name}] Video saved: {output_path}")
         return output_path
 
-    except Exception as e:
+    except BaseException as e:
+        if output_path is not None:
+            output_path.unlink(missing_ok=True)  # placeholder or partial render
+        if not isinstance(e, Exception):
+            raise  # e.g. RenderTimeout: the render queue handles it
         log(f"[{account_name}] Video generation FAILED for '{topic}': {e}")
-        return None
\ No newline at end of file
+        return None
@@ -1,3 +1,5 @@
+import argparse
+from engine.metrics import write_prometheus, write_run_report
 from engine.scheduler import run_once
 from engine.utils import log
 
@@ -17,8 +19,28 @@ def main():
             log(f"  Video: {r['video_path']}")
         log("----")
 
+    report = write_run_report({
+        "posts": [
+            {
+                "account": r["account"],
+                "topic": r["topic"],
+                "title": r["post"]["title"],
+                "queue_path": r["queue_path"],
+                "airtable_id": r.get("airtable_id"),
+            }
+            for r in results
+        ],
+    })
+    log(f"Run report: {report}")
+    log(f"Metrics:    {write_prometheus('run')}")
     log("Run complete.")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Run the social bot engine.")
+    parser.add_argument("--daemon", action="store_true", help="Stay running and fire accounts at their schedule.json slots")
+    if parser.parse_args().daemon:
+        from engine.daemon import run_daemon
+        run_daemon()
+    else:
+        main()
@@ -0,0 +1,41 @@
+import argparse
+from engine.account_manager import AccountManager
+from engine.batch_jobs import cancel_job, ingest_batch, list_batches, prepare_batch, submit_batch, submit_job
+from engine.utils import log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overnight post generation via the OpenAI Batch API.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prep = sub.add_parser("prepare", help="Claim topics, write the job file and submit it")
+    prep.add_argument("--no-submit", action="store_true", help="Only write the JSONL job file")
+    sub.add_parser("submit", help="Submit a job written with --no-submit").add_argument("job")
+    sub.add_parser("cancel", help="Cancel a prepared or submitted job, freeing its topics").add_argument("job")
+    ing = sub.add_parser("ingest", help="Save posts from a completed batch")
+    ing.add_argument("batch_id")
+    sub.add_parser("status", help="List known batch jobs")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        for b in list_batches():
+            log(f"{b['job']}  {b['status']:<10} {b['batch_id'] or '-'}  ({b['items']} posts)")
+        return
+    if args.command == "submit":
+        submit_job(args.job)
+        return
+    if args.command == "cancel":
+        cancel_job(args.job)
+        return
+
+    account_manager = AccountManager()
+    if args.command == "prepare":
+        path = prepare_batch(account_manager, account_manager.get_all_accounts())
+        if path and not args.no_submit:
+            submit_batch(path)
+    elif args.command == "ingest":
+        for r in ingest_batch(account_manager, args.batch_id):
+            log(f"[{r['account']}] {r['post']['title']}  →  {r['queue_path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+End-to-end throughput benchmark against the local fake servers.
+
+Seeds N accounts × M topics into a fake Airtable, runs `run_once` and then
+a Pinterest drain against the fakes, and reports accounts/min, posts/min,
+pins/min, p50/p95 latency per pipeline stage and peak RSS. Everything the
+run writes goes to a temporary data dir, never into the repo.
+
+    python -m tools.bench_pipeline --accounts 20 --topics 50 --posts 2 --latency-ms 80
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from tools.fake_servers import FakeConfig, FakeServers
+
+
+def _write_accounts(accounts_dir: Path, names: list[str], posts: int) -> None:
+    for name in names:
+        account_dir = accounts_dir / name
+        account_dir.mkdir(parents=True)
+        (account_dir / "settings.json").write_text(json.dumps({
+            "account_name": name, "niche": "bench", "style_key": "default",
+            "platforms": ["pinterest"], "daily_posts": posts,
+        }))
+        (account_dir / "schedule.json").write_text(json.dumps({"pinterest": ["09:00"]}))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def stage_report(snapshot: dict) -> dict[str, dict[str, float]]:
+    """Per-stage and per-external-call latencies from the engine's metrics."""
+    out = {}
+    for name, prefix in (("bot_stage_seconds", ""), ("bot_external_seconds", "ext:")):
+        for labels, h in snapshot["histograms"].get(name, {}).items():
+            label = dict(pair.split("=", 1) for pair in labels.split(","))
+            stage = label.pop("stage", None) or f"{label.pop('service', '')} {label.pop('method', '')}"
+            key = prefix + stage + "".join(f" {v}" for _, v in sorted(label.items()))
+            out[key] = {
+                "count": h["count"],
+                "p50_ms": h["p50"] * 1000,
+                "p95_ms": h["p95"] * 1000,
+                "total_s": h["sum"],
+            }
+    return dict(sorted(out.items()))
+
+
+def run_benchmark(args) -> dict:
+    servers = FakeServers(FakeConfig(args.latency_ms, args.jitter_ms, args.error_rate)).start()
+    names = servers.seed(args.accounts, args.topics)
+
+    tmp = Path(tempfile.mkdtemp(prefix="bench_"))
+    _write_accounts(tmp / "accounts", names, args.posts)
+    # The engine reads these at import time, so set them before importing it.
+    os.environ.update(servers.env())
+    os.environ.update({
+        "BOT_DATA_DIR": str(tmp / "data"),
+        "BOT_ACCOUNTS_DIR": str(tmp / "accounts"),
+        "LLM_CACHE_BYPASS": "1",
+    })
+
+    from engine import pinterest_poster, scheduler
+    from engine.account_manager import AccountManager
+    from engine.metrics import metrics
+    from engine.render_queue import RenderQueue
+
+    metrics.reset()
+    manager = AccountManager()
+    manager.make_images = args.images or args.videos
+    manager.make_videos = args.videos
+    manager.render_queue = RenderQueue() if args.videos else None
+
+    start = time.perf_counter()
+    results = scheduler.run_once(max_workers=args.workers, account_manager=manager)
+    run_s = time.perf_counter() - start
+    manager.close()
+
+    pins = 0
+    drain_s = 0.0
+    if args.pins and not manager.make_images:
+        # Text-only bench: opt into the image-URL fallback so pins still go out.
+        settings = pinterest_poster.pinterest_settings()
+        pinterest_poster.pinterest_settings = lambda: {**settings, "fallback_image_url": "https://example.com/bench.jpg"}
+    if args.pins:
+        start = time.perf_counter()
+        pins = pinterest_poster.drain_pinterest_posts(max_pins=args.pins, workers=args.pin_workers)
+        drain_s = time.perf_counter() - start
+
+    report = {
+        "accounts": args.accounts,
+        "topics_per_account": args.topics,
+        "posts_per_account": args.posts,
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "run_seconds": run_s,
+        "posts": len(results),
+        "accounts_per_min": args.accounts / run_s * 60 if run_s else 0.0,
+        "posts_per_min": len(results) / run_s * 60 if run_s else 0.0,
+        "pins": pins,
+        "pins_per_min": pins / drain_s * 60 if drain_s else 0.0,
+        "stages": stage_report(metrics.snapshot()),
+        "peak_rss_mb": peak_rss_mb(),
+        "server_requests": {
+            "airtable": dict(servers.airtable.requests),
+            "openai": dict(servers.openai.requests),
+            "pinterest": dict(servers.pinterest.requests),
+        },
+    }
+    servers.stop()
+    return report
+
+
+def print_report(report: dict) -> None:
+    print("----- PIPELINE BENCHMARK -----")
+    print(f"accounts × topics: {report['accounts']} × {report['topics_per_account']}"
+          f"  (posts/account {report['posts_per_account']}, latency {report['latency_ms']} ms,"
+          f" 429 rate {report['error_rate']})")
+    print(f"run_once:       {report['run_seconds']:.2f}s  →  {report['accounts_per_min']:.1f} accounts/min,"
+          f" {report['posts_per_min']:.1f} posts/min ({report['posts']} posts)")
+    if report["pins"]:
+        print(f"pinterest drain: {report['pins']} pins  →  {report['pins_per_min']:.1f} pins/min")
+    print(f"peak RSS:       {report['peak_rss_mb']:.0f} MiB")
+    print(f"{'stage':<22}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for stage, s in report["stages"].items():
+        print(f"{stage:<22}{s['count']:>7}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['total_s']:>10.2f}")
+    for service, counts in report["server_requests"].items():
+        print(f"{service} requests: {counts}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark run_once and the Pinterest drain against local fakes.")
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=20, help="'To Use' topics seeded per account")
+    parser.add_argument("--posts", type=int, default=1, help="daily_posts per account")
+    parser.add_argument("--workers", type=int, default=None, help="run_once account workers")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake responses that are 429")
+    parser.add_argument("--images", action="store_true", help="Also generate images (fake PNGs)")
+    parser.add_argument("--videos", action="store_true", help="Also render videos (needs ffmpeg/Pillow)")
+    parser.add_argument("--pins", type=int, default=0, help="Drain this many pins after the run")
+    parser.add_argument("--pin-workers", type=int, default=None)
+    parser.add_argument("--json", type=Path, default=None, help="Also write the report as JSON here")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    sys.exit(0 if report["posts"] else 1)
+
+
+if __name__ == "__main__":
+    main()
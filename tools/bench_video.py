@@ -0,0 +1,42 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from engine.utils import log
+from engine.video_generator import RENDERERS, video_settings
+
+
+def bench(image_path: Path, title: str, runs: int, renderers: list[str]) -> dict[str, list[float]]:
+    settings = video_settings()
+    timings: dict[str, list[float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in renderers:
+            timings[name] = []
+            for i in range(runs):
+                out = Path(tmp) / f"{name}_{i}.mp4"
+                start = time.perf_counter()
+                RENDERERS[name](image_path, title, out, settings)
+                timings[name].append(time.perf_counter() - start)
+                log(f"{name:<8} run {i + 1}/{runs}: {timings[name][-1]:.2f}s ({out.stat().st_size / 1024:.0f} KiB)")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the ffmpeg still-image and moviepy video renderers.")
+    parser.add_argument("image", type=Path, help="Source image (e.g. a generated 1024x1536 PNG)")
+    parser.add_argument("--title", default="Five cozy ideas for a rustic farmhouse porch")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--renderers", nargs="+", default=list(RENDERERS), choices=list(RENDERERS))
+    args = parser.parse_args()
+
+    timings = bench(args.image, args.title, args.runs, args.renderers)
+
+    log("----- VIDEO RENDER BENCHMARK -----")
+    for name, times in timings.items():
+        log(f"{name:<8} best {min(times):.2f}s  mean {sum(times) / len(times):.2f}s")
+    if len(timings) == 2 and "ffmpeg" in timings and "moviepy" in timings:
+        log(f"speedup: {min(timings['moviepy']) / min(timings['ffmpeg']):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,97 +1,226 @@
+import argparse
+import heapq
+import html
 import json
+import os
 from pathlib import Path
-from engine.utils import BASE_DIR, log, ensure_dir
+from engine.utils import DATA_DIR, GENERATED_DIR, log, ensure_dir
 
+DASH_DIR = DATA_DIR / "dashboard"
+MANIFEST_PATH = DASH_DIR / "manifest.json"
+INDEX_LIMIT = 200  # rows on the front page
+MANIFEST_VERSION = 2  # bumped when the cached row shape changes
 
-def gather_generated():
-    generated_dir = BASE_DIR / "generated"
-    if not generated_dir.exists():
-        return []
+STYLE = """
+        body { font-family: system-ui, -apple-system, BlinkMacSystemFont, sans-serif; padding: 20px; }
+        table { border-collapse: collapse; width: 100%; font-size: 14px; }
+        th, td { border: 1px solid #ccc; padding: 6px 8px; }
+        th { background: #f0f0f0; position: sticky; top: 0; }
+        tr:nth-child(even) { background: #fafafa; }
+        td img { max-width: 120px; display: block; }
+        nav a { margin-right: 10px; }
+"""
+COLUMNS = ("Generated At", "Account", "Topic", "Title", "Image", "Video", "JSON")
 
-    rows = []
-    for account_dir in generated_dir.iterdir():
-        if not account_dir.is_dir():
-            continue
-        for date_dir in account_dir.iterdir():
-            if not date_dir.is_dir():
+
+# ──────────────────────────────────────────────────────────
+# Manifest: json path → {mtime, size, row}; date dirs → mtime
+def load_manifest() -> dict:
+    if MANIFEST_PATH.exists():
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    return {"version": MANIFEST_VERSION, "files": {}, "dirs": {}}
+
+
+def save_manifest(manifest: dict) -> None:
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def _extract_row(path: str) -> dict | None:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError) as e:
+        log(f"Skipping unreadable {path}: {e}")
+        return None
+    return {
+        "account": data.get("account"),
+        "topic": data.get("topic"),
+        "title": data.get("title"),
+        "generated_at": data.get("generated_at") or "",
+        "image_path": data.get("image_path"),
+        "thumbnail": (data.get("media") or {}).get("thumbnail"),
+        "video_path": data.get("video_path"),
+        "json_path": path,
+    }
+
+
+def _page_key(row: dict) -> tuple[str, str]:
+    return row["account"] or "unknown", (row["generated_at"] or "")[:7] or "undated"
+
+
+def update_manifest(manifest: dict, full: bool = False) -> set[tuple[str, str]]:
+    """
+    Parse only new or changed JSON files (by mtime and size) into the
+    manifest; `full` re-parses every file. Returns the (account, month)
+    pages whose rows changed.
+    """
+    generated_dir = GENERATED_DIR
+    files, dirs = manifest["files"], manifest["dirs"]
+    dirty: set[tuple[str, str]] = set()
+    seen_dirs = set()
+
+    if generated_dir.exists():
+        for account_dir in os.scandir(generated_dir):
+            if not account_dir.is_dir():
                 continue
-            for f in date_dir.glob("*.json"):
-                with open(f, "r", encoding="utf-8") as fh:
-                    data = json.load(fh)
-                rows.append({
-                    "account": data.get("account"),
-                    "topic": data.get("topic"),
-                    "title": data.get("title"),
-                    "generated_at": data.get("generated_at"),
-                    "image_path": data.get("image_path"),
-                    "video_path": data.get("video_path"),
-                    "json_path": str(f)
-                })
+            for date_dir in os.scandir(account_dir.path):
+                if not date_dir.is_dir():
+                    continue
+                seen_dirs.add(date_dir.path)
+                # Always stat the files: rewriting a JSON in place doesn't
+                # move its folder's mtime, so that alone can't rule a folder out.
+                dirs[date_dir.path] = date_dir.stat().st_mtime_ns
+
+                prefix = date_dir.path + os.sep
+                present = set()
+                for entry in os.scandir(date_dir.path):
+                    if not entry.name.endswith(".json") or not entry.is_file():
+                        continue
+                    present.add(entry.path)
+                    st = entry.stat()
+                    old = files.get(entry.path)
+                    if not full and old and old["mtime"] == st.st_mtime_ns and old["size"] == st.st_size:
+                        continue
+                    row = _extract_row(entry.path)
+                    if old:
+                        dirty.add(_page_key(old["row"]))
+                    if row is None:
+                        files.pop(entry.path, None)
+                        continue
+                    files[entry.path] = {"mtime": st.st_mtime_ns, "size": st.st_size, "row": row}
+                    dirty.add(_page_key(row))
+
+                for path in [p for p in files if p.startswith(prefix) and p not in present]:
+                    dirty.add(_page_key(files.pop(path)["row"]))
+
+    for path in [d for d in dirs if d not in seen_dirs]:
+        del dirs[path]
+        prefix = path + os.sep
+        for f in [p for p in files if p.startswith(prefix)]:
+            dirty.add(_page_key(files.pop(f)["row"]))
+    return dirty
+
+
+def gather_generated():
+    """All rows, newest first (served from the manifest; only changed files are parsed)."""
+    manifest = load_manifest()
+    update_manifest(manifest)
+    rows = [entry["row"] for entry in manifest["files"].values()]
     return sorted(rows, key=lambda r: r["generated_at"], reverse=True)
 
 
-def build_dashboard():
-    rows = gather_generated()
-    dash_dir = BASE_DIR / "dashboard"
-    ensure_dir(dash_dir)
-    out = dash_dir / "index.html"
-
-    html_rows = []
-    for r in rows[:200]:  # show last 200
-        html_rows.append(f"""
-        <tr>
-          <td>{r['generated_at']}</td>
-          <td>{r['account']}</td>
-          <td>{r['topic']}</td>
-          <td>{r['title']}</td>
-          <td>{r['image_path'] or ''}</td>
-          <td>{r['video_path'] or ''}</td>
-          <td>{r['json_path']}</td>
-        </tr>
-        """)
-
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-      <meta charset="utf-8" />
-      <title>Social Bot Engine Dashboard</title>
-      <style>
-        body {{ font-family: system-ui, -apple-system, BlinkMacSystemFont, sans-serif; padding: 20px; }}
-        table {{ border-collapse: collapse; width: 100%; font-size: 14px; }}
-        th, td {{ border: 1px solid #ccc; padding: 6px 8px; }}
-        th {{ background: #f0f0f0; position: sticky; top: 0; }}
-        tr:nth-child(even) {{ background: #fafafa; }}
-      </style>
-    </head>
-    <body>
-      <h1>Social Bot Engine - Generated Content</h1>
-      <p>Total posts: {len(rows)}</p>
-      <table>
-        <thead>
-          <tr>
-            <th>Generated At</th>
-            <th>Account</th>
-            <th>Topic</th>
-            <th>Title</th>
-            <th>Image</th>
-            <th>Video</th>
-            <th>JSON</th>
-          </tr>
-        </thead>
-        <tbody>
-          {''.join(html_rows)}
-        </tbody>
-      </table>
-    </body>
-    </html>
-    """
+# ──────────────────────────────────────────────────────────
+def _cell(value) -> str:
+    return f"<td>{html.escape(str(value)) if value else ''}</td>"
+
+
+def _image_cell(row: dict, page_dir: Path) -> str:
+    """Thumbnail (written by the image stage) linking to the full image; else the path."""
+    thumb = row.get("thumbnail")
+    if not thumb or not row["image_path"]:
+        return _cell(row["image_path"])
+    src = html.escape(os.path.relpath(thumb, page_dir))
+    href = html.escape(os.path.relpath(row["image_path"], page_dir))
+    return f'<td><a href="{href}"><img src="{src}" loading="lazy" alt="" /></a></td>'
+
+
+def _write_page(out: Path, title: str, heading: str, nav: str, rows) -> None:
+    """Stream one HTML page to `out` row by row."""
+    ensure_dir(out.parent)
+    tmp = out.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(f"""<!DOCTYPE html>
+<html>
+<head>
+  <meta charset="utf-8" />
+  <title>{html.escape(title)}</title>
+  <style>{STYLE}  </style>
+</head>
+<body>
+  <h1>{html.escape(heading)}</h1>
+  {nav}
+  <table>
+    <thead>
+      <tr>{''.join(f'<th>{c}</th>' for c in COLUMNS)}</tr>
+    </thead>
+    <tbody>
+""")
+        for r in rows:
+            f.write(
+                "      <tr>"
+                + _cell(r["generated_at"]) + _cell(r["account"]) + _cell(r["topic"])
+                + _cell(r["title"]) + _image_cell(r, out.parent) + _cell(r["video_path"])
+                + _cell(r["json_path"])
+                + "</tr>\n"
+            )
+        f.write("""    </tbody>
+  </table>
+</body>
+</html>
+""")
+    os.replace(tmp, out)
+
+
+def _page_path(account: str, month: str) -> Path:
+    return DASH_DIR / "pages" / account / f"{month}.html"
+
+
+def build_dashboard(full: bool = False):
+    ensure_dir(DASH_DIR)
+    manifest = load_manifest()
+    dirty = update_manifest(manifest, full=full)
+
+    pages: dict[tuple[str, str], list[dict]] = {}
+    for entry in manifest["files"].values():
+        pages.setdefault(_page_key(entry["row"]), []).append(entry["row"])
+
+    # Rewrite only the account/month pages that changed.
+    for key in (set(pages) if full else dirty):
+        account, month = key
+        out = _page_path(account, month)
+        rows = pages.get(key)
+        if not rows:
+            out.unlink(missing_ok=True)
+            continue
+        rows.sort(key=lambda r: r["generated_at"], reverse=True)
+        _write_page(
+            out, f"{account} — {month}", f"{account} — {month} ({len(rows)} posts)",
+            '<nav><a href="../../index.html">← All accounts</a></nav>', rows,
+        )
 
-    with open(out, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    # Front page: latest rows plus links to every page.
+    total = len(manifest["files"])
+    links = []
+    for account, month in sorted(pages):
+        href = _page_path(account, month).relative_to(DASH_DIR).as_posix()
+        links.append(f'<a href="{html.escape(href)}">{html.escape(account)} {month} ({len(pages[(account, month)])})</a>')
+    latest = heapq.nlargest(INDEX_LIMIT, (e["row"] for e in manifest["files"].values()), key=lambda r: r["generated_at"])
+    _write_page(
+        DASH_DIR / "index.html", "Social Bot Engine Dashboard", "Social Bot Engine - Generated Content",
+        f"<p>Total posts: {total}</p><nav>{' '.join(links)}</nav>", latest,
+    )
 
-    log(f"Dashboard written to: {out}")
+    save_manifest(manifest)
+    log(f"Dashboard written to: {DASH_DIR / 'index.html'} ({len(dirty)} page(s) updated)")
 
 
 if __name__ == "__main__":
-    build_dashboard()
+    parser = argparse.ArgumentParser(description="Build the generated-content dashboard.")
+    parser.add_argument("--full", action="store_true", help="Rescan every file and rewrite every page")
+    build_dashboard(full=parser.parse_args().full)
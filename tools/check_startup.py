@@ -0,0 +1,78 @@
+"""
+Import-time budget check for the short-lived entry points.
+
+Imports each entry module in a fresh interpreter with `-X importtime`,
+takes the best of a few runs, and fails (exit 1) if a module goes over
+its budget or pulls in a heavy dependency that should only load on first
+use (openai, moviepy, numpy, Pillow).
+
+    python -m tools.check_startup
+    python -m tools.check_startup --runs 5 --scale 2   # slow CI box
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# module → import budget (ms, cumulative for the module itself, excluding interpreter start)
+BUDGETS_MS = {
+    "run": 400,
+    "engine.pinterest_poster": 300,
+    "tools.build_dashboard": 100,
+}
+HEAVY_MODULES = ("openai", "moviepy", "numpy", "PIL", "imageio")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)\s*$")
+
+
+def measure(module: str) -> tuple[float, set[str]]:
+    """Return (cumulative import ms of `module`, top-level packages it imported)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    cumulative_us = None
+    imported = set()
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        name = m.group(3)
+        imported.add(name.split(".")[0])
+        if name == module:
+            cumulative_us = int(m.group(2))
+    return (cumulative_us or 0) / 1000, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check entry-point import times against their budgets.")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per module; the fastest counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (slow machines)")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<28}{'best ms':>10}{'budget':>10}  heavy imports")
+    for module, budget in BUDGETS_MS.items():
+        budget *= args.scale
+        best = float("inf")
+        heavy: set[str] = set()
+        for _ in range(max(1, args.runs)):
+            ms, imported = measure(module)
+            best = min(best, ms)
+            heavy |= imported & set(HEAVY_MODULES)
+        ok = best <= budget and not heavy
+        failed |= not ok
+        print(f"{module:<28}{best:>10.1f}{budget:>10.0f}  {', '.join(sorted(heavy)) or '-'}"
+              f"{'' if ok else '  FAIL'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 import shutil
 from pathlib import Path
-from engine.utils import BASE_DIR, log
-from engine.airtable_client import airtable_create
+from engine.utils import ACCOUNTS_DIR, log
+from engine.airtable_writer import AirtableWriteBuffer
 
 
 def main():
-    template_dir = BASE_DIR / "accounts" / "TEMPLATE_ACCOUNT"
+    template_dir = ACCOUNTS_DIR / "TEMPLATE_ACCOUNT"
     if not template_dir.exists():
         log("TEMPLATE_ACCOUNT folder not found.")
         return
@@ -15,7 +15,7 @@ def main():
     style_key = input("Style key (e.g. country_living, dogs, hunting, default): ").strip() or "default"
     daily_posts = int(input("Daily posts (e.g. 1, 2, 3): ").strip() or "1")
 
-    new_dir = BASE_DIR / "accounts" / name
+    new_dir = ACCOUNTS_DIR / name
     if new_dir.exists():
         log("That account folder already exists.")
         return
@@ -39,14 +39,19 @@ def main():
     log(f"Created folder for account: {name}")
 
     # Create Airtable Accounts row
-    airtable_create("Accounts", {
-        "Name": name,
-        "Niche": niche,
-        "Style": style_key,
-        "Daily Posts": daily_posts
-    })
-
-    log("Created Airtable 'Accounts' record. You can now add Topics linked to this account.")
+    with AirtableWriteBuffer() as writer:
+        record = writer.create("Accounts", {
+            "Name": name,
+            "Niche": niche,
+            "Style": style_key,
+            "Daily Posts": daily_posts
+        })
+
+    if record.exception():
+        log(f"Failed to create Airtable 'Accounts' record: {record.exception()}")
+        return
+
+    log(f"Created Airtable 'Accounts' record {record.result()['id']}. You can now add Topics linked to this account.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,371 @@
+"""
+Local stand-ins for the Airtable, OpenAI and Pinterest endpoints the engine uses.
+
+Each fake runs on its own ThreadingHTTPServer with configurable latency
+(base + jitter) and a 429 injection rate (with Retry-After). Airtable
+supports pagination (pageSize/offset/maxRecords), field projection,
+the simple filterByFormula shapes the engine sends, and 10-record batch
+writes. Point the engine at them with AIRTABLE_API_URL, OPENAI_BASE_URL
+and PINTEREST_API_URL (see `FakeServers.env()`).
+
+Run standalone:  python -m tools.fake_servers --latency-ms 80 --error-rate 0.02
+"""
+
+import argparse
+import base64
+import calendar
+import itertools
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+
+_VERBS = ("grow", "cook", "paint", "fix", "plan", "clean", "style", "build", "store", "bake", "sew", "plant")
+_ADJS = ("rustic", "cozy", "budget", "quick", "seasonal", "vintage", "tiny", "bright", "natural", "easy", "bold", "calm")
+_NOUNS = ("kitchen", "garden", "porch", "pantry", "quilt", "bread", "herbs", "shelves", "lanterns", "jars", "fence", "soap")
+_AUDIENCES = ("beginners", "families", "renters", "weekends", "winter", "small spaces", "kids", "guests", "autumn", "spring")
+
+
+def _topic_text(n: int) -> str:
+    """A varied, deterministic topic phrase (so near-duplicate checks see distinct topics)."""
+    rng = random.Random(n)
+    return f"How to {rng.choice(_VERBS)} {rng.choice(_ADJS)} {rng.choice(_NOUNS)} for {rng.choice(_AUDIENCES)} #{n % 997}"
+
+
+class FakeConfig:
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 20.0, error_rate: float = 0.0, retry_after: float = 0.2):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+    fake = None  # set on the per-server subclass
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, payload=None, headers: dict | None = None) -> None:
+        data = json.dumps(payload if payload is not None else {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method: str) -> None:
+        fake = self.fake
+        cfg = fake.config
+        body = self._body()
+        delay = max(0.0, cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000
+        time.sleep(delay)
+        fake.count(method)
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            fake.count("429")
+            self._send(429, {"error": "RATE_LIMIT_REACHED"}, {"Retry-After": str(cfg.retry_after)})
+            return
+        url = urlparse(self.path)
+        status, payload = fake.route(method, url.path, parse_qsl(url.query), body)
+        self._send(status, payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+
+class _FakeService:
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.requests: dict[str, int] = {}
+        self.server: ThreadingHTTPServer | None = None
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def route(self, method: str, path: str, query: list[tuple[str, str]], body: bytes):
+        raise NotImplementedError
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        handler = type(f"{type(self).__name__}Handler", (_Handler,), {"fake": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self.server.server_address[1]}"
+
+    def stop(self) -> None:
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+# ──────────────────────────────────────────────────────────
+class FakeAirtable(_FakeService):
+    """In-memory tables: {table: {record_id: record}}, insertion-ordered."""
+
+    def __init__(self, config: FakeConfig):
+        super().__init__(config)
+        self.tables: dict[str, dict[str, dict]] = {}
+        self._ids = itertools.count(1)
+
+    def _new_id(self) -> str:
+        return f"rec{next(self._ids):014d}"
+
+    def insert(self, table: str, fields: dict) -> dict:
+        with self.lock:
+            rec = {"id": self._new_id(), "createdTime": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+                   "fields": dict(fields), "_modified": time.time()}
+            self.tables.setdefault(table, {})[rec["id"]] = rec
+            return rec
+
+    def _public(self, rec: dict, fields: list[str] | None = None) -> dict:
+        shown = rec["fields"] if not fields else {k: v for k, v in rec["fields"].items() if k in fields}
+        return {"id": rec["id"], "createdTime": rec["createdTime"], "fields": shown}
+
+    def _names(self, value) -> set[str]:
+        """Resolve a linked-record field to the linked records' Name values."""
+        accounts = self.tables.get("Accounts", {})
+        values = value if isinstance(value, list) else [value]
+        return {accounts[v]["fields"].get("Name", v) if v in accounts else v for v in values if v}
+
+    def _matcher(self, formula: str | None):
+        if not formula:
+            return lambda rec: True
+        equals: dict[str, set[str]] = {}
+        for field, value in re.findall(r"\{?(\w[\w ]*?)\}?\s*=\s*'([^']*)'", formula):
+            equals.setdefault(field.strip(), set()).add(value)
+        since = re.search(r"IS_AFTER\(LAST_MODIFIED_TIME\(\),\s*DATETIME_PARSE\('([^']+)'\)\)", formula)
+        since_ts = calendar.timegm(time.strptime(since.group(1)[:19], "%Y-%m-%dT%H:%M:%S")) if since else None
+
+        def match(rec: dict) -> bool:
+            for field, wanted in equals.items():
+                value = rec["fields"].get(field)
+                have = self._names(value) if field == "Account" else {value}
+                if not have & wanted:
+                    return False
+            return since_ts is None or rec["_modified"] > since_ts
+        return match
+
+    def route(self, method, path, query, body):
+        parts = [p for p in path.split("/") if p]  # v0, base, table[, id]
+        if len(parts) < 3:
+            return 404, {"error": "NOT_FOUND"}
+        table = parts[2]
+        record_id = parts[3] if len(parts) > 3 else None
+        payload = json.loads(body or b"{}")
+
+        if method == "GET":
+            params: dict[str, list[str]] = {}
+            for k, v in query:
+                params.setdefault(k, []).append(v)
+            page_size = min(100, int(params.get("pageSize", ["100"])[0]))
+            max_records = int(params.get("maxRecords", ["0"])[0]) or None
+            offset = int(params.get("offset", ["0"])[0])
+            fields = params.get("fields[]")
+            match = self._matcher(params.get("filterByFormula", [None])[0])
+            with self.lock:
+                rows = [r for r in self.tables.get(table, {}).values() if match(r)]
+            if max_records:
+                rows = rows[:max_records]
+            page = rows[offset:offset + page_size]
+            out = {"records": [self._public(r, fields) for r in page]}
+            if offset + page_size < len(rows):
+                out["offset"] = str(offset + page_size)
+            return 200, out
+
+        if method == "POST":
+            items = payload.get("records") or [{"fields": payload.get("fields", {})}]
+            if len(items) > 10:
+                return 422, {"error": "INVALID_RECORDS"}
+            created = [self._public(self.insert(table, item.get("fields", {}))) for item in items]
+            return 200, ({"records": created} if "records" in payload else created[0])
+
+        if method == "PATCH":
+            items = payload.get("records") or [{"id": record_id, "fields": payload.get("fields", {})}]
+            if len(items) > 10:
+                return 422, {"error": "INVALID_RECORDS"}
+            updated = []
+            with self.lock:
+                for item in items:
+                    rec = self.tables.get(table, {}).get(item["id"])
+                    if rec is None:
+                        return 404, {"error": "NOT_FOUND"}
+                    rec["fields"].update(item.get("fields", {}))
+                    rec["_modified"] = time.time()
+                    updated.append(self._public(rec))
+            return 200, ({"records": updated} if "records" in payload else updated[0])
+
+        return 405, {"error": "METHOD_NOT_ALLOWED"}
+
+
+# ──────────────────────────────────────────────────────────
+def _png(width: int, height: int, rgb=(200, 170, 120)) -> bytes:
+    """Solid-colour PNG built with zlib (keeps the fakes dependency-free)."""
+    row = b"\x00" + bytes(rgb) * width
+    raw = zlib.compress(row * height, 6)
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", raw) + chunk(b"IEND", b""))
+
+
+class FakeOpenAI(_FakeService):
+    def __init__(self, config: FakeConfig):
+        super().__init__(config)
+        self._image_b64: dict[str, str] = {}
+
+    @staticmethod
+    def _post(n: int, topic: str) -> dict:
+        return {
+            "title": f"Fresh ideas: {topic}"[:90],
+            "description": f"A short, friendly take on {topic}. Save it for later.",
+            "hashtags": [f"tag{i}" for i in range(6)],
+            **({"index": n} if n >= 0 else {}),
+        }
+
+    def route(self, method, path, query, body):
+        payload = json.loads(body or b"{}")
+        if path.endswith("/chat/completions"):
+            prompt = payload["messages"][-1]["content"]
+            numbered = re.findall(r"^(\d+)\. (.+)$", prompt, flags=re.M)
+            if numbered:
+                content = {"posts": [self._post(int(n), t) for n, t in numbered]}
+            else:
+                topic = re.search(r"Topic: (.*)", prompt)
+                content = self._post(-1, topic.group(1) if topic else "something")
+            return 200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                "model": payload.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": json.dumps(content)}}],
+                "usage": {"prompt_tokens": 50, "completion_tokens": 80, "total_tokens": 130},
+            }
+        if path.endswith("/images/generations"):
+            size = payload.get("size", "1024x1536")
+            with self.lock:
+                if size not in self._image_b64:
+                    w, h = (int(x) for x in size.split("x"))
+                    self._image_b64[size] = base64.b64encode(_png(w, h)).decode()
+                b64 = self._image_b64[size]
+            return 200, {"created": int(time.time()),
+                         "data": [{"b64_json": b64} for _ in range(int(payload.get("n", 1)))]}
+        return 404, {"error": {"message": f"unknown path {path}"}}
+
+
+class FakePinterest(_FakeService):
+    def __init__(self, config: FakeConfig):
+        super().__init__(config)
+        self.pins: list[dict] = []
+        self.media: dict[str, str] = {}
+        self._ids = itertools.count(1)
+        self.base_url = ""
+
+    def route(self, method, path, query, body):
+        if method == "POST" and path.endswith("/pins"):
+            pin = {"id": str(next(self._ids)), **json.loads(body or b"{}")}
+            pin.get("media_source", {}).pop("data", None)  # don't keep base64 blobs around
+            with self.lock:
+                self.pins.append(pin)
+            return 201, {"id": pin["id"]}
+        if method == "POST" and path.endswith("/media"):
+            media_id = str(next(self._ids))
+            with self.lock:
+                self.media[media_id] = "registered"
+            return 201, {"media_id": media_id, "media_type": "video",
+                         "upload_url": f"{self.base_url}/upload/{media_id}",
+                         "upload_parameters": {"key": f"uploads/{media_id}"}}
+        if method == "POST" and "/upload/" in path:
+            with self.lock:
+                self.media[path.rsplit("/", 1)[1]] = "succeeded"
+            return 201, {}
+        if method == "GET" and "/media/" in path:
+            return 200, {"status": self.media.get(path.rsplit("/", 1)[1], "failed")}
+        return 404, {"code": 404, "message": "not found"}
+
+
+# ──────────────────────────────────────────────────────────
+class FakeServers:
+    def __init__(self, config: FakeConfig | None = None):
+        self.config = config or FakeConfig()
+        self.airtable = FakeAirtable(self.config)
+        self.openai = FakeOpenAI(self.config)
+        self.pinterest = FakePinterest(self.config)
+        self.urls: dict[str, str] = {}
+
+    def start(self) -> "FakeServers":
+        self.urls["airtable"] = self.airtable.start() + "/v0"
+        self.urls["openai"] = self.openai.start() + "/v1"
+        base = self.pinterest.start()
+        self.pinterest.base_url = base
+        self.urls["pinterest"] = base + "/v5"
+        return self
+
+    def stop(self) -> None:
+        for fake in (self.airtable, self.openai, self.pinterest):
+            fake.stop()
+
+    def env(self) -> dict[str, str]:
+        """Environment variables that point the engine at these fakes."""
+        return {
+            "AIRTABLE_API_URL": self.urls["airtable"],
+            "AIRTABLE_API_KEY": "fake",
+            "AIRTABLE_BASE_ID": "appFAKE",
+            "OPENAI_BASE_URL": self.urls["openai"],
+            "OPENAI_API_KEY": "fake",
+            "PINTEREST_API_URL": self.urls["pinterest"],
+            "PINTEREST_ACCESS_TOKEN": "fake",
+            "PINTEREST_BOARD_ID": "board-fake",
+        }
+
+    def seed(self, accounts: int, topics_per_account: int) -> list[str]:
+        """Create Accounts rows and linked 'To Use' Topics; returns the account names."""
+        names = []
+        for a in range(accounts):
+            name = f"bench_{a:03d}"
+            rec = self.airtable.insert("Accounts", {"Name": name})
+            for t in range(topics_per_account):
+                self.airtable.insert("Topics", {"Topic": _topic_text(a * 100_003 + t), "Account": [rec["id"]], "Status": "To Use"})
+            names.append(name)
+        return names
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run local fake Airtable/OpenAI/Pinterest servers.")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--accounts", type=int, default=0, help="Seed this many accounts")
+    parser.add_argument("--topics", type=int, default=0, help="Seed this many topics per account")
+    args = parser.parse_args()
+
+    servers = FakeServers(FakeConfig(args.latency_ms, args.jitter_ms, args.error_rate)).start()
+    if args.accounts:
+        servers.seed(args.accounts, args.topics)
+    for key, value in servers.env().items():
+        print(f"export {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servers.stop()
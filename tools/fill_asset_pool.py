@@ -0,0 +1,43 @@
+"""
+Top up the image warm pool for this replica's accounts.
+
+For cron setups (the daemon refills on its own between slots). Runs
+even when `asset_pool.enabled` is off, so the pool can be seeded before
+switching it on.
+
+    python -m tools.fill_asset_pool
+    python -m tools.fill_asset_pool --account my_account --depth 5
+"""
+
+import argparse
+
+from engine.asset_pool import AssetPool, asset_pool_settings
+from engine.sharding import current_shard
+from engine.utils import ACCOUNTS_DIR, log
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate images into the asset pool.")
+    parser.add_argument("--account", action="append", help="Only this account (repeatable)")
+    parser.add_argument("--depth", type=int, help="Override asset_pool.depth")
+    args = parser.parse_args()
+
+    settings = asset_pool_settings()
+    pool = AssetPool(
+        depth=args.depth or int(settings["depth"]),
+        variants=int(settings["variants"]),
+        max_age_hours=float(settings["max_age_hours"]),
+        prewarm_video=bool(settings["prewarm_video"]),
+    )
+    shard = current_shard()
+    paths = [
+        p for p in sorted(ACCOUNTS_DIR.iterdir())
+        if p.is_dir() and p.name != "TEMPLATE_ACCOUNT" and shard.owns(p.name)
+        and (not args.account or p.name in args.account)
+    ]
+    added = pool.refill_accounts(paths)
+    log(f"Asset pool: +{added} image(s) across {len(paths)} account(s).")
+
+
+if __name__ == "__main__":
+    main()
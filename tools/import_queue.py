@@ -0,0 +1,12 @@
+from engine.queue_store import get_queue_store
+from engine.utils import GENERATED_DIR, log
+
+
+def main():
+    store = get_queue_store()
+    store.import_json_tree(GENERATED_DIR)
+    log(f"Queue now holds: {store.counts()}")
+
+
+if __name__ == "__main__":
+    main()